@@ -4,7 +4,13 @@ PNG Manual Cropper
 Crop specific amounts from each edge of a PNG file.
 """
 
+import asyncio
+import glob
+import mmap
+import os
+import shutil
 import sys
+from collections import Counter
 from pathlib import Path
 from PIL import Image
 
@@ -21,26 +27,37 @@ def crop_manual(input_path: Path, output_path: Path, top=0, right=0, bottom=0, l
         bottom: Pixels to remove from bottom
         left: Pixels to remove from left
     """
-    print(f"[INFO] Loading image: {input_path}")
-    img = Image.open(input_path)
-    
-    width, height = img.size
-    print(f"[INFO] Original size: {width}x{height}")
-    
-    # Calculate new dimensions
-    new_left = left
-    new_top = top
-    new_right = width - right
-    new_bottom = height - bottom
-    
-    # Validate crop box
-    if new_right <= new_left or new_bottom <= new_top:
-        print("[ERROR] Invalid crop dimensions - would result in zero or negative size!")
-        print(f"  Left: {new_left}, Top: {new_top}, Right: {new_right}, Bottom: {new_bottom}")
-        return False
+    if top == right == bottom == left == 0:
+        # Nothing to crop: skip decode/encode and just copy the bytes over.
+        if Path(input_path).resolve() != Path(output_path).resolve():
+            shutil.copyfile(input_path, output_path)
+        print(f"[OK] No crop requested, copied unchanged: {output_path}")
+        return True
     
-    # Crop the image
-    cropped = img.crop((new_left, new_top, new_right, new_bottom))
+    print(f"[INFO] Loading image: {input_path}")
+    # Map the file read-only and let Pillow read straight from the mapping.
+    # The map is closed before saving so overwriting the input in place works.
+    with open(input_path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            Image.open(mm) as img:
+        width, height = img.size
+        print(f"[INFO] Original size: {width}x{height}")
+        
+        # Calculate new dimensions
+        new_left = left
+        new_top = top
+        new_right = width - right
+        new_bottom = height - bottom
+        
+        # Validate crop box
+        if new_right <= new_left or new_bottom <= new_top:
+            print("[ERROR] Invalid crop dimensions - would result in zero or negative size!")
+            print(f"  Left: {new_left}, Top: {new_top}, Right: {new_right}, Bottom: {new_bottom}")
+            return False
+        
+        # Crop the image; the source is released on exit so only the
+        # cropped pixels are held in memory while encoding.
+        cropped = img.crop((new_left, new_top, new_right, new_bottom))
     
     new_width, new_height = cropped.size
     print(f"[INFO] Cropped size: {new_width}x{new_height}")
@@ -52,19 +69,47 @@ def crop_manual(input_path: Path, output_path: Path, top=0, right=0, bottom=0, l
     reduction = (1 - new_pixels / original_pixels) * 100
     print(f"[INFO] Size reduction: {reduction:.1f}%")
     
-    # Save the cropped image
-    cropped.save(output_path, 'PNG', optimize=True)
+    # Save the cropped image. A single zlib pass at the default level is
+    # used; optimize=True retries every filter/strategy and dominates runtime.
+    cropped.save(output_path, 'PNG', compress_level=6)
     print(f"[OK] Saved cropped image: {output_path}")
     return True
 
 
+async def _crop_one(semaphore: asyncio.Semaphore, input_path: Path, output_path: Path, top, right, bottom, left):
+    """Run crop_manual in a worker thread, bounded by the shared semaphore."""
+    async with semaphore:
+        try:
+            return await asyncio.to_thread(crop_manual, input_path, output_path, top, right, bottom, left)
+        except Exception as e:
+            print(f"[ERROR] Failed to crop image {input_path}: {e}")
+            return False
+
+
+async def crop_batch(input_paths: list[Path], out_dir: Path, top=0, right=0, bottom=0, left=0) -> int:
+    """
+    Crop several images concurrently, writing each to out_dir under its own name.
+    
+    Concurrency is capped at the CPU count so zlib buffers don't pile up.
+    Returns the number of images that failed.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+    results = await asyncio.gather(
+        *(_crop_one(semaphore, p, out_dir / p.name, top, right, bottom, left) for p in input_paths)
+    )
+    return sum(1 for ok in results if not ok)
+
+
 def main():
     if len(sys.argv) < 3:
         print("Usage: crop_png_manual.py <input.png> <output.png> [top] [right] [bottom] [left]")
+        print("       crop_png_manual.py \"<glob>\" <output_dir> [top] [right] [bottom] [left]")
         print("")
         print("Arguments:")
-        print("  input.png   - Input PNG file")
-        print("  output.png  - Output PNG file (can be same as input to overwrite)")
+        print("  input.png   - Input PNG file, or a quoted glob pattern to crop many files")
+        print("  output.png  - Output PNG file (can be same as input to overwrite),")
+        print("                or output directory when a glob pattern is given")
         print("  top         - Pixels to remove from top (default: 0)")
         print("  right       - Pixels to remove from right (default: 0)")
         print("  bottom      - Pixels to remove from bottom (default: 0)")
@@ -76,6 +121,9 @@ def main():
         print("")
         print("  # Remove 350px from bottom only")
         print("  crop_png_manual.py discord-card.png discord-card.png 0 0 350 0")
+        print("")
+        print("  # Crop every PNG in a folder into cropped/")
+        print("  crop_png_manual.py \"reports/*.png\" cropped 0 0 350 0")
         return 1
     
     input_path = Path(sys.argv[1])
@@ -86,6 +134,24 @@ def main():
     bottom = int(sys.argv[5]) if len(sys.argv) > 5 else 0
     left = int(sys.argv[6]) if len(sys.argv) > 6 else 0
     
+    # An existing file is always cropped as-is, even if its name contains
+    # glob characters such as "card [1].png".
+    if not input_path.exists() and glob.has_magic(sys.argv[1]):
+        input_paths = sorted(Path(p) for p in glob.glob(sys.argv[1]))
+        if not input_paths:
+            print(f"[ERROR] No files match: {sys.argv[1]}")
+            return 1
+        # Outputs are named after the input file, so matches from different
+        # folders with the same name would overwrite each other.
+        name_counts = Counter(p.name for p in input_paths)
+        clashes = sorted(name for name, count in name_counts.items() if count > 1)
+        if clashes:
+            print(f"[ERROR] Several matches share a file name: {', '.join(clashes)}")
+            return 1
+        failed = asyncio.run(crop_batch(input_paths, output_path, top, right, bottom, left))
+        print(f"[INFO] Cropped {len(input_paths) - failed}/{len(input_paths)} images into {output_path}")
+        return 0 if failed == 0 else 1
+    
     if not input_path.exists():
         print(f"[ERROR] Input file not found: {input_path}")
         return 1
@@ -13,13 +13,22 @@ Features:
 """
 
 import csv
+import mmap
+import os
 import sys
 import re
 import base64
+import heapq
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime
-from html import escape
+from datetime import date, datetime
+from string import Template
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from collections.abc import Iterable, Iterator
 
 # =============================================================================
 # CONFIGURATION - Edit these paths to your guild icons
@@ -37,7 +46,42 @@ GUILD_CONFIG = {
 
 # Server name for the badge
 SERVER_NAME = "Nordanaar"
-LOG_TIMESTAMP_RE = re.compile(r"^(\d{1,2})/(\d{1,2}) (\d{1,2}):(\d{2}):(\d{2})\.(\d{3})")
+# I/O buffer for the log/CSV scans and HTML writes (default 8 KiB means a syscall per refill)
+LOG_BUFFER_SIZE = 1 << 20
+# Chunk size for whole-buffer regex scans of the log
+LOG_CHUNK_SIZE = 1 << 23
+LOG_TIMESTAMP_MS_RE = re.compile(rb"^(\d{1,2}/\d{1,2}) (\d{1,2}:\d{2}:\d{2})\.(\d{3})")
+RAID_DATE_RE = re.compile(r'^(\d{1,2}/\d{1,2})\s+\d{1,2}:\d{2}:\d{2}')
+PET_OWNER_RE = re.compile(rb"\([A-Z][a-z]+\)")
+PET_NAME_RE = re.compile(rb"\b([A-Z][a-z]+)[^\S\n]+\Z")
+SUNDER_VALUE_RE = re.compile(rb"-?\d+")
+# The per-raider log patterns are bytes patterns: scan_log reads the log as
+# raw bytes and only decodes the names it keeps.
+DEATH_RE = re.compile(rb"^\d{1,2}/\d{1,2} \d{1,2}:\d{2}:\d{2}\.\d{3}  ([A-Za-z'`-]+) dies\.\r?$")
+# The unanchored patterns below open with a "not preceded by a name
+# character" guard. A match can only start where a name starts, so re stops
+# retrying every offset inside a name; the matches themselves are unchanged.
+HEALTHSTONE_RE = re.compile(
+    rb"(?<![A-Za-z'`-])(?P<owner>[A-Za-z'`-]+)'s .*?(?:Healthstone|Lifestone) heals (?P<target>[A-Za-z'`-]+)",
+    re.IGNORECASE,
+)
+ORANGE_RE = re.compile(
+    rb"(?<![A-Za-z'`-])(?P<target>[A-Za-z'`-]+) uses Conjured Mana Orange\.",
+    re.IGNORECASE,
+)
+RESURRECTION_SPELLS = (
+    b"Resurrection",
+    b"Ancestral Spirit",
+    b"Redemption",
+    b"Rebirth",
+    b"Revive Champion",
+)
+RESURRECTION_RE = re.compile(
+    rb"(?<![A-Za-z'`-])(?P<caster>[A-Za-z'`-]+) casts (?:"
+    + b"|".join(re.escape(name) for name in RESURRECTION_SPELLS)
+    + rb") on (?P<target>[A-Za-z'`-]+)\.",
+    re.IGNORECASE,
+)
 
 RAID_BOSSES = {
     "Naxxramas": [
@@ -174,9 +218,44 @@ RAID_BOSSES = {
 }
 
 
+# Lowercase ZONE_INFO substrings mapped to raid names
+RAID_ZONE_NAMES = {
+    "naxxramas": "Naxxramas",
+    "onyxia": "Onyxia's Lair",
+    "molten": "Molten Core",
+    "blackwing": "Blackwing Lair",
+    "ahn'qiraj": "Temple of Ahn'Qiraj",
+    "aq20": "Ruins of Ahn'Qiraj",
+    "zulgurub": "Zul'Gurub",
+    "zulaman": "Zul'Aman",
+    "sunwell": "Sunwell Plateau",
+    "black_temple": "Black Temple",
+    "karazhan": "Karazhan",
+    "gruul": "Gruul's Lair",
+    "magtheridon": "Magtheridon's Lair",
+    "serpentshrine": "Serpentshrine Cavern",
+    "tempest_keep": "Tempest Keep",
+    "hyjal": "Battle for Mount Hyjal",
+}
+# All zone keys in one alternation so a zone name is scanned once, not per
+# key. Longer keys come first so they win over a shorter key at the same spot.
+RAID_ZONE_RE = re.compile(
+    "|".join(re.escape(key) for key in sorted(RAID_ZONE_NAMES, key=len, reverse=True))
+)
+
+# Lowercased boss names per raid as one case-sensitive alternation, matched
+# against a lowercased line. Without IGNORECASE re can skip ahead on the
+# names' first bytes instead of case-folding every character it tries.
+BOSS_LITERAL_PATTERNS = {
+    raid: re.compile(b"|".join(re.escape(name.lower().encode("utf-8")) for name in bosses))
+    for raid, bosses in RAID_BOSSES.items()
+    if bosses
+}
+
+
 def copper_to_gold_rounded(copper: int) -> int:
-    """Convert copper to gold, rounding to the nearest whole gold."""
-    return int((copper / 10000) + 0.5)
+    """Convert copper to gold, rounding to the nearest whole gold (halves round up)."""
+    return (copper + 5000) // 10000
 
 
 def copper_to_gsc_short(copper: int) -> str:
@@ -185,287 +264,465 @@ def copper_to_gsc_short(copper: int) -> str:
     return f"{g}g"
 
 
+# Same output as html.escape(s, quote=True), but strings with nothing to
+# escape (most player names) are returned without being copied.
+_ESCAPE_MAP = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
+_UNSAFE_RE = re.compile(r"[&<>\"']")
+
+
+def _esc(s: str) -> str:
+    """HTML-escape s, skipping the copy when it has no special characters."""
+    return s.translate(_ESCAPE_MAP) if _UNSAFE_RE.search(s) else s
+
+
 def safe_int(x, default=0):
     """Safely convert to integer."""
+    s = x if isinstance(x, str) else str(x)
+    # Clean digit strings, the usual case, skip the cleanup below.
+    if s.isdecimal():
+        return int(s)
     try:
-        return int(str(x).strip().replace(",", ""))
-    except:
+        return int(s.strip().replace(",", ""))
+    except ValueError:
         return default
 
 
+@lru_cache(maxsize=32)
+def _load_icon_cached(path_str: str, mtime_ns: int) -> str:
+    """Read and encode an icon; keyed on mtime so edited icons are reloaded."""
+    with open(path_str, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+
 def load_icon_base64(icon_path: Path) -> str:
     """Load an icon file and return base64 encoded string."""
-    if not icon_path.exists():
+    try:
+        mtime_ns = icon_path.stat().st_mtime_ns
+    except OSError:
         return ""
-    with open(icon_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+    return _load_icon_cached(str(icon_path), mtime_ns)
 
-def parse_log_timestamp(line: str) -> datetime | None:
-    match = LOG_TIMESTAMP_RE.match(line)
-    if not match:
-        return None
-    month, day, hour, minute, second, millis = (int(g) for g in match.groups())
-    return datetime(datetime.now().year, month, day, hour, minute, second, millis * 1000)
+def load_guild_icons() -> dict[str, str]:
+    """Base64-encode every configured guild icon that exists, keyed by guild."""
+    script_dir = Path(__file__).parent
+    icon_data = {}
+    for guild, config in GUILD_CONFIG.items():
+        icon_b64 = load_icon_base64(script_dir / config["icon_path"])
+        if icon_b64:
+            icon_data[guild] = icon_b64
+    return icon_data
 
-def build_boss_pattern(raid_name: str) -> re.Pattern | None:
-    boss_names = RAID_BOSSES.get(raid_name, [])
-    if not boss_names:
-        return None
-    return re.compile("|".join(re.escape(name) for name in boss_names), re.IGNORECASE)
 
-def parse_death_breakdown(
-    log_path: Path,
-    raider_names: set[str],
-    raid_name: str,
-    logger_name: str | None,
-    boss_window_seconds: int = 45,
-) -> dict[str, dict[str, int]]:
-    boss_pattern = build_boss_pattern(raid_name)
-    last_boss_time: datetime | None = None
-    breakdown: dict[str, dict[str, int]] = {
-        name: {"total": 0, "boss": 0, "trash": 0} for name in raider_names
-    }
+@lru_cache(maxsize=32)
+def _guild_icon_fragment(guild: str, icon_b64: str) -> str:
+    """HTML for one guild icon; built once per guild/icon pair and reused."""
+    glow_color = GUILD_CONFIG.get(guild, {}).get("glow_color", "rgba(255,255,255,0.2)")
+    return f'''
+          <div class="guild-icon-wrapper">
+            <div class="guild-icon-glow" style="background: radial-gradient(circle, {glow_color} 0%, transparent 70%);"></div>
+            <img class="guild-icon" src="data:image/png;base64,{icon_b64}" alt="{_esc(guild)}">
+          </div>'''
 
-    death_re = re.compile(r"^\d{1,2}/\d{1,2} \d{1,2}:\d{2}:\d{2}\.\d{3}  ([A-Za-z'`-]+) dies\.$")
 
-    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            timestamp = parse_log_timestamp(line)
-            if timestamp and boss_pattern and boss_pattern.search(line):
-                last_boss_time = timestamp
+@lru_cache(maxsize=8)
+def format_guild_names(guild_names: tuple[str, ...]) -> str:
+    """Escaped guild names joined with the "×" separator; cached per guild list."""
+    return '<span class="separator">×</span>'.join([_esc(g) for g in guild_names])
 
-            match = death_re.match(line)
-            if match:
-                name = match.group(1)
-            elif "You die." in line:
-                name = logger_name or "You"
-            else:
-                continue
 
-            if name not in raider_names:
-                continue
+def build_guild_icons_html(guild_names: list[str], icon_data: dict[str, str]) -> str:
+    """Concatenate the icon fragments for the guilds that have an icon."""
+    return "".join(
+        _guild_icon_fragment(guild, icon_data[guild])
+        for guild in guild_names
+        if icon_data.get(guild)
+    )
 
-            is_boss = False
-            if timestamp and last_boss_time:
-                delta = (timestamp - last_boss_time).total_seconds()
-                is_boss = 0 <= delta <= boss_window_seconds
 
-            breakdown[name]["total"] += 1
-            if is_boss:
-                breakdown[name]["boss"] += 1
-            else:
-                breakdown[name]["trash"] += 1
+@lru_cache(maxsize=None)
+def _log_day_ms(month_day: bytes) -> int:
+    """Milliseconds up to the start of a log "MM/DD" date in the current year."""
+    month, day = month_day.split(b"/")
+    return date(datetime.now().year, int(month), int(day)).toordinal() * 86_400_000
 
-    return breakdown
 
-def parse_healthstone_uses(
-    log_path: Path,
-    raider_names: set[str],
-    logger_name: str | None,
-) -> dict[str, int]:
-    counts = {name: 0 for name in raider_names}
-    healthstone_re = re.compile(
-        r"(?P<owner>[A-Za-z'`-]+)'s .*?(?:Healthstone|Lifestone) heals (?P<target>[A-Za-z'`-]+)",
-        re.IGNORECASE,
-    )
+@lru_cache(maxsize=4096)
+def _log_clock_ms(clock: bytes) -> int:
+    """Milliseconds since midnight for a log "HH:MM:SS" clock reading."""
+    hour, minute, second = clock.split(b":")
+    return int(hour) * 3_600_000 + int(minute) * 60_000 + int(second) * 1000
 
-    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            match = healthstone_re.search(line)
-            if not match:
-                continue
-            target = match.group("target")
-            if target.lower() == "you" and logger_name:
-                target = logger_name
-            if target not in raider_names:
-                continue
-            counts[target] += 1
 
-    return counts
+def parse_log_timestamp_ms(line: bytes) -> int | None:
+    """
+    Parse a log line's timestamp as a plain millisecond count, for cheap deltas.
+    
+    Consecutive lines mostly share a date and second, so those parts are
+    converted through small caches and only the milliseconds go through int().
+    """
+    match = LOG_TIMESTAMP_MS_RE.match(line)
+    if not match:
+        return None
+    month_day, clock, millis = match.groups()
+    return _log_day_ms(month_day) + _log_clock_ms(clock) + int(millis)
 
+@dataclass
+class RaiderLogStats:
+    """Per-raider counts gathered from one pass over the combat log."""
+    death_breakdown: dict[str, dict[str, int]] = field(default_factory=dict)
+    healthstone_uses: dict[str, int] = field(default_factory=dict)
+    orange_uses: dict[str, int] = field(default_factory=dict)
+    resurrection_casts: dict[str, int] = field(default_factory=dict)
 
-def parse_orange_uses(
-    log_path: Path,
-    raider_names: set[str],
-    logger_name: str | None,
-) -> dict[str, int]:
-    counts = {name: 0 for name in raider_names}
-    orange_re = re.compile(r"(?P<target>[A-Za-z'`-]+) uses Conjured Mana Orange\.", re.IGNORECASE)
-
-    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            match = orange_re.search(line)
-            if not match:
-                if "You use Conjured Mana Orange." in line and logger_name:
-                    target = logger_name
-                else:
-                    continue
-            else:
-                target = match.group("target")
 
-            if target not in raider_names:
-                continue
-            counts[target] += 1
+# Lowercased keywords that every event scan_log counts must contain
+EVENT_KEYWORDS = (
+    b" dies.",
+    b"you die.",
+    b"stone heals ",
+    b"conjured mana orange.",
+    b" casts ",
+    b"you cast ",
+)
+
+EVENT_KEYWORD_RE = re.compile(b"|".join(re.escape(keyword) for keyword in EVENT_KEYWORDS))
+
 
-    return counts
+@lru_cache(maxsize=None)
+def _event_keyword_pattern(raid_name: str) -> re.Pattern:
+    """Alternation of EVENT_KEYWORDS and the raid's lowercased boss names."""
+    bosses = RAID_BOSSES.get(raid_name, [])
+    keywords = EVENT_KEYWORDS + tuple(name.lower().encode("utf-8") for name in bosses)
+    return re.compile(b"|".join(re.escape(keyword) for keyword in keywords))
 
 
-def parse_resurrection_casts(
+def scan_log(
     log_path: Path,
     raider_names: set[str],
+    raid_name: str,
     logger_name: str | None,
-) -> dict[str, int]:
-    counts = {name: 0 for name in raider_names}
-    spell_names = [
-        "Resurrection",
-        "Ancestral Spirit",
-        "Redemption",
-        "Rebirth",
-        "Revive Champion",
-    ]
-    spell_pattern = "|".join(re.escape(name) for name in spell_names)
-    cast_re = re.compile(
-        rf"(?P<caster>[A-Za-z'`-]+) casts (?:{spell_pattern}) on (?P<target>[A-Za-z'`-]+)\.",
-        re.IGNORECASE,
+    boss_window_seconds: int = 45,
+) -> RaiderLogStats:
+    """
+    Read the combat log once and collect deaths (split into boss and trash),
+    healthstone uses, Conjured Mana Orange uses and resurrection casts for
+    each raider.
+    
+    A death counts as a boss death if it happens within boss_window_seconds
+    of the last line mentioning one of the raid's bosses. "You ..." lines
+    are credited to logger_name.
+    """
+    boss_literal_pattern = BOSS_LITERAL_PATTERNS.get(raid_name)
+    boss_search = boss_literal_pattern.search if boss_literal_pattern else None
+    event_search = _event_keyword_pattern(raid_name).search
+    event_only_search = EVENT_KEYWORD_RE.search
+    boss_window_ms = boss_window_seconds * 1000
+    last_boss_ms: int | None = None
+    # Death counters are kept as parallel lists indexed by raider, and only
+    # turned into the per-name breakdown dicts once the scan is done.
+    names = list(raider_names)
+    name_index = {name: i for i, name in enumerate(names)}
+    death_totals = [0] * len(names)
+    boss_deaths = [0] * len(names)
+    trash_deaths = [0] * len(names)
+    stats = RaiderLogStats(
+        healthstone_uses={name: 0 for name in raider_names},
+        orange_uses={name: 0 for name in raider_names},
+        resurrection_casts={name: 0 for name in raider_names},
     )
+    healthstones = stats.healthstone_uses
+    oranges = stats.orange_uses
+    resurrections = stats.resurrection_casts
+
+    # The log is read in large line-aligned chunks and the keyword search
+    # runs over each whole (lowercased) chunk, so Python only ever sees the
+    # lines that mention an event or a boss.
+    for chunk in iter_log_chunks(log_path):
+        lowered_chunk = chunk.lower()
+        pos = 0
+        while True:
+            hit = event_search(lowered_chunk, pos)
+            if not hit:
+                break
+            start = chunk.rfind(b"\n", 0, hit.start()) + 1
+            end = chunk.find(b"\n", hit.end())
+            end = len(chunk) if end < 0 else end + 1
+            pos = end
+            line = chunk[start:end]
+            lowered = lowered_chunk[start:end]
+
+            # Only boss mentions and deaths need the timestamp, so the
+            # timestamp regex stays off the path every other line takes.
+            timestamp_ms = None
+            if boss_search and boss_search(lowered):
+                timestamp_ms = parse_log_timestamp_ms(line)
+                if timestamp_ms is not None:
+                    last_boss_ms = timestamp_ms
+
+            # Most hits are boss mentions with no event on the line; one
+            # keyword search turns those away before the per-event checks.
+            if not event_only_search(lowered):
+                continue
 
-    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            match = cast_re.search(line)
-            if not match:
-                if "You cast " in line and logger_name:
-                    if any(spell in line for spell in spell_names):
-                        caster = logger_name
-                    else:
-                        continue
+            # Deaths, split by whether a boss was seen in the preceding window
+            match = DEATH_RE.match(line) if b" dies." in line else None
+            if match:
+                name = match.group(1).decode("ascii")
+            elif b"You die." in line:
+                name = logger_name or "You"
+            else:
+                name = None
+
+            i = name_index.get(name)
+            if i is not None:
+                if timestamp_ms is None:
+                    timestamp_ms = parse_log_timestamp_ms(line)
+                is_boss = False
+                if timestamp_ms is not None and last_boss_ms is not None:
+                    is_boss = 0 <= timestamp_ms - last_boss_ms <= boss_window_ms
+
+                death_totals[i] += 1
+                if is_boss:
+                    boss_deaths[i] += 1
                 else:
-                    continue
+                    trash_deaths[i] += 1
+
+            # Healthstones
+            match = HEALTHSTONE_RE.search(line) if b"stone heals " in lowered else None
+            if match:
+                target = match.group("target").decode("ascii")
+                if target.lower() == "you" and logger_name:
+                    target = logger_name
+                if target in raider_names:
+                    healthstones[target] += 1
+
+            # Conjured Mana Oranges
+            match = ORANGE_RE.search(line) if b"conjured mana orange." in lowered else None
+            if match:
+                target = match.group("target").decode("ascii")
+            elif b"You use Conjured Mana Orange." in line and logger_name:
+                target = logger_name
             else:
-                caster = match.group("caster")
+                target = None
+            if target in raider_names:
+                oranges[target] += 1
 
-            if caster not in raider_names:
-                continue
-            counts[caster] += 1
+            # Resurrections
+            match = RESURRECTION_RE.search(line) if b" casts " in lowered else None
+            if match:
+                caster = match.group("caster").decode("ascii")
+            elif b"You cast " in line and logger_name and any(spell in line for spell in RESURRECTION_SPELLS):
+                caster = logger_name
+            else:
+                caster = None
+            if caster in raider_names:
+                resurrections[caster] += 1
 
-    return counts
+    stats.death_breakdown = {
+        name: {"total": total, "boss": boss, "trash": trash}
+        for name, total, boss, trash in zip(names, death_totals, boss_deaths, trash_deaths)
+    }
+    return stats
 
 
-def parse_combat_log_for_guilds(log_path: Path, target_guilds: list[str]) -> set[str]:
-    """Parse combat log to extract character names belonging to target guilds."""
-    guild_members = set()
-    pattern = re.compile(
-        r"COMBATANT_INFO:.*?&([^&]+)&[A-Z]+&[A-Za-z]+&\d+&[^&]*&(" + 
-        "|".join(re.escape(g) for g in target_guilds) + r")&"
-    )
-    
-    try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                match = pattern.search(line)
-                if match:
-                    char_name = match.group(1).strip()
-                    guild_members.add(char_name)
-    except Exception as e:
-        print(f"[WARN] Could not parse combat log for guilds: {e}")
-    
-    return guild_members
+@dataclass
+class CombatLogInfo:
+    """Raid-level facts gathered from one pass over the combat log."""
+    guild_members: frozenset[str] = field(default_factory=frozenset)
+    pets: frozenset[str] = field(default_factory=frozenset)
+    raid_name: str = "Raid"
+    raid_date: str = ""
+    logger_deaths: int = 0
 
 
-def parse_combat_log_for_pets(log_path: Path) -> set[str]:
-    """Parse combat log to identify pet names."""
-    pets = set()
-    pattern = re.compile(r"\b([A-Z][a-z]+)\s+\([A-Z][a-z]+\)")
-    
-    try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                for match in pattern.finditer(line):
-                    pets.add(match.group(1))
-    except Exception as e:
-        print(f"[WARN] Could not parse combat log for pets: {e}")
-    
-    return pets
+def zone_to_raid_name(zone: str) -> str | None:
+    """Map a ZONE_INFO zone name to a raid name, or None if it isn't a raid."""
+    match = RAID_ZONE_RE.search(zone.strip().lower())
+    return RAID_ZONE_NAMES[match.group()] if match else None
 
 
-def count_logger_deaths(log_path: Path) -> int:
-    """Count the number of times 'You die.' appears in the combat log."""
-    count = 0
-    try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                if "You die." in line:
-                    count += 1
-    except Exception as e:
-        print(f"[WARN] Could not count logger deaths: {e}")
+def format_raid_date(date_str: str) -> str:
+    """Format a combat log "MM/DD" date as "DD MMM YYYY" using the current year."""
+    current_year = datetime.now().year
+    parsed_date = datetime.strptime(f"{date_str}/{current_year}", "%m/%d/%Y")
+    return parsed_date.strftime("%d %b %Y")
+
+
+def advise_sequential(fd: int) -> None:
+    """
+    Tell the kernel a file will be read front to back, so it reads ahead
+    aggressively while we parse. A no-op where posix_fadvise isn't available.
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def iter_log_chunks(log_path: Path, chunk_size: int = LOG_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield the log as bytes chunks of roughly chunk_size that each end on a
+    line boundary (except possibly the last), so no line is split.
+    """
+    with open(log_path, "rb", buffering=0) as f:
+        advise_sequential(f.fileno())
+        tail = b""
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0:
+                tail = block
+                continue
+            tail = block[cut:]
+            yield block[:cut]
+        if tail:
+            yield tail
+
+
+@contextmanager
+def map_log(log_path: Path):
+    """
+    Yield the contents of a log file as a read-only mmap.
     
+    Falls back to reading the file into memory when it can't be mapped
+    (empty files, pipes). Both support find/rfind/slicing and bytes regexes.
+    """
+    with open(log_path, "rb") as f:
+        advise_sequential(f.fileno())
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield f.read()
+            return
+        with mm:
+            yield mm
+
+
+def _line_bounds(data, pos: int) -> tuple[int, int]:
+    """Return the (start, end) offsets of the line containing pos, excluding the newline."""
+    start = data.rfind(b"\n", 0, pos) + 1
+    end = data.find(b"\n", pos)
+    return start, (len(data) if end < 0 else end)
+
+
+def _count_lines_containing(data, needle: bytes) -> int:
+    """Count the lines of data that contain needle at least once."""
+    count = 0
+    pos = data.find(needle)
+    while pos >= 0:
+        count += 1
+        _, line_end = _line_bounds(data, pos)
+        pos = data.find(needle, line_end)
     return count
 
 
-def detect_raid_from_log(log_path: Path) -> str:
-    """Detect raid/zone name from combat log."""
-    raid_names = {
-        "naxxramas": "Naxxramas",
-        "onyxia": "Onyxia's Lair", 
-        "molten": "Molten Core",
-        "blackwing": "Blackwing Lair",
-        "ahn'qiraj": "Temple of Ahn'Qiraj",
-        "aq20": "Ruins of Ahn'Qiraj",
-        "zulgurub": "Zul'Gurub",
-        "zulaman": "Zul'Aman",
-        "sunwell": "Sunwell Plateau",
-        "black_temple": "Black Temple",
-        "karazhan": "Karazhan",
-        "gruul": "Gruul's Lair",
-        "magtheridon": "Magtheridon's Lair",
-        "serpentshrine": "Serpentshrine Cavern",
-        "tempest_keep": "Tempest Keep",
-        "hyjal": "Battle for Mount Hyjal",
-    }
-    
-    try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                if "ZONE_INFO:" in line:
-                    parts = line.split("&")
-                    if len(parts) >= 2:
-                        zone = parts[1].strip().lower()
-                        for key, name in raid_names.items():
-                            if key in zone:
-                                return name
-    except Exception as e:
-        print(f"[WARN] Could not detect raid from log: {e}")
-    
-    return "Raid"
+def _scan_raid_name(data) -> str | None:
+    """Return the raid named by the first raid ZONE_INFO line, found with find()."""
+    pos = data.find(b"ZONE_INFO:")
+    while pos >= 0:
+        line_start, line_end = _line_bounds(data, pos)
+        parts = data[line_start:line_end].split(b"&")
+        if len(parts) >= 2:
+            raid_name = zone_to_raid_name(parts[1].decode("utf-8", errors="replace"))
+            if raid_name:
+                return raid_name
+        pos = data.find(b"ZONE_INFO:", line_end)
+    return None
 
 
-def extract_raid_date_from_log(log_path: Path) -> str:
+def _scan_guild_members(data, target_guilds: list[str]) -> frozenset[str]:
     """
-    Extract the raid date from the first timestamp in the combat log.
+    Collect target guild members from COMBATANT_INFO lines in the mapped log.
     
-    WoW combat logs have timestamps in the format: MM/DD HH:MM:SS.mmm
-    This function extracts the first timestamp and formats it as "DD MMM YYYY".
+    The fields are "&name&CLASS&Race&sex&...&guild&", so each line is split
+    on "&" and checked field by field rather than with a backtracking regex.
+    """
+    guilds = frozenset(g.encode("utf-8") for g in target_guilds)
+    members = set()
+    if not guilds:
+        return frozenset(members)
+    pos = data.find(b"COMBATANT_INFO:")
+    while pos >= 0:
+        _, line_end = _line_bounds(data, pos)
+        parts = data[pos:line_end].split(b"&", 7)
+        if (
+            len(parts) > 7
+            and parts[6] in guilds
+            and parts[1]
+            and parts[2].isalpha() and parts[2].isupper()
+            and parts[3].isalpha()
+            and parts[4].isdigit()
+        ):
+            # Names are interned so the CSV-side membership tests can match
+            # on identity before falling back to comparing characters.
+            members.add(sys.intern(parts[1].decode("utf-8", errors="replace").strip()))
+        pos = data.find(b"COMBATANT_INFO:", line_end)
+    return frozenset(members)
+
+
+def _scan_pets(data) -> frozenset[str]:
+    """Collect pet names from "Name (Owner)" mentions in the mapped log."""
+    pets = set()
+    # Only lines with a "(" can mention a pet, so find the "(Owner)" part
+    # first (it has a literal prefix), then check for the name right before it.
+    for match in PET_OWNER_RE.finditer(data):
+        line_start, _ = _line_bounds(data, match.start())
+        pet = PET_NAME_RE.search(data, line_start, match.start())
+        if pet:
+            pets.add(sys.intern(pet.group(1).decode("ascii")))
+    return frozenset(pets)
+
+
+def parse_combat_log(log_path: Path, target_guilds: list[str]) -> CombatLogInfo:
+    """
+    Scan the combat log once and collect guild members, pets, raid name,
+    raid date and the number of "You die." lines.
     
-    Returns the formatted date string, or today's date if parsing fails.
+    The log is memory-mapped and searched with bytes regexes and find(), so
+    only the lines that actually match are ever sliced out and decoded.
+    The raid date is taken from the first line's timestamp and falls back to
+    today's date if that line has none.
     """
-    date_pattern = re.compile(r'^(\d{1,2}/\d{1,2})\s+\d{1,2}:\d{2}:\d{2}')
+    info = CombatLogInfo()
+    date_str = None
     
     try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                match = date_pattern.match(line)
-                if match:
-                    # Extract MM/DD and add current year
-                    date_str = match.group(1)
-                    current_year = datetime.now().year
-                    
-                    # Parse and format the date
-                    parsed_date = datetime.strptime(f"{date_str}/{current_year}", "%m/%d/%Y")
-                    return parsed_date.strftime("%d %b %Y")
+        with map_log(log_path) as data:
+            # The raid date comes from the timestamp on the first line.
+            _, first_end = _line_bounds(data, 0)
+            first_line = data[:first_end].decode("utf-8", errors="replace")
+            match = RAID_DATE_RE.match(first_line.lstrip("\ufeff"))
+            if match:
+                date_str = match.group(1)
+            
+            info.guild_members = _scan_guild_members(data, target_guilds)
+            
+            info.pets = _scan_pets(data)
+            
+            info.raid_name = _scan_raid_name(data) or info.raid_name
+            
+            info.logger_deaths = _count_lines_containing(data, b"You die.")
     except Exception as e:
+        print(f"[WARN] Could not parse combat log: {e}")
+    
+    try:
+        info.raid_date = format_raid_date(date_str) if date_str else ""
+    except ValueError as e:
         print(f"[WARN] Could not extract date from log: {e}")
+    if not info.raid_date:
+        info.raid_date = datetime.now().strftime("%d %b %Y")
     
-    # Fallback to today's date
-    return datetime.now().strftime("%d %b %Y")
+    return info
 
 
 def parse_sunder_data(summary_path: Path) -> list[tuple[str, int, int]]:
@@ -486,127 +743,68 @@ def parse_sunder_data(summary_path: Path) -> list[tuple[str, int, int]]:
         return sunders
     
     try:
-        with open(summary_path, "r", encoding="utf-8", errors="replace") as f:
-            in_sunder_section = False
-            for line in f:
-                if "Sunder Armor Summary" in line:
-                    in_sunder_section = True
-                    continue
-                
-                if in_sunder_section:
-                    stripped = line.strip()
-                    if not stripped:
-                        break
-                    
-                    # Check if line starts with whitespace (indented data)
-                    if not line[0].isspace():
-                        break
-                    
-                    # Parse line with resilient number extraction to support cases where
-                    # one of the columns is omitted when it is zero.
-                    parts = stripped.split(maxsplit=1)
-                    if not parts:
-                        continue
-
-                    name = parts[0]
-                    remainder = parts[1] if len(parts) > 1 else ""
-                    values = [safe_int(match, 0) for match in re.findall(r"-?\d+", remainder)]
-
-                    if len(values) >= 2:
-                        trash, boss = values[0], values[1]
-                    elif len(values) == 1:
-                        # If only one value exists, treat it as total and map it to boss.
-                        # This preserves old behavior and keeps total calculations accurate.
-                        trash, boss = 0, values[0]
-                    else:
-                        trash, boss = 0, 0
-
-                    sunders.append((name, trash, boss))
+        # The summary is plain ASCII apart from player names, so scan it as bytes
+        # and only decode the names we keep.
+        lines = summary_path.read_bytes().split(b"\n")
+        start = next(
+            (i + 1 for i, line in enumerate(lines) if b"Sunder Armor Summary" in line),
+            len(lines),
+        )
+        for line in lines[start:]:
+            stripped = line.strip()
+            if not stripped:
+                break
+            
+            # Check if line starts with whitespace (indented data)
+            if not line[:1].isspace():
+                break
+            
+            # Parse line with resilient number extraction to support cases where
+            # one of the columns is omitted when it is zero.
+            parts = stripped.split()
+            name = parts[0].decode("utf-8", errors="replace")
+            if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+                # Common case: "name trash boss" as plain integers
+                values = [int(parts[1]), int(parts[2])]
+            else:
+                remainder = stripped[len(parts[0]):]
+                values = [int(match) for match in SUNDER_VALUE_RE.findall(remainder)]
+
+            if len(values) >= 2:
+                trash, boss = values[0], values[1]
+            elif len(values) == 1:
+                # If only one value exists, treat it as total and map it to boss.
+                # This preserves old behavior and keeps total calculations accurate.
+                trash, boss = 0, values[0]
+            else:
+                trash, boss = 0, 0
+
+            sunders.append((name, trash, boss))
     except Exception as e:
         print(f"[WARN] Could not parse sunder data: {e}")
     
     return sunders
 
 
-def generate_html(
-    rows: list[tuple[str, int, int]],
-    guild_names: list[str],
-    raid_name: str,
-    server_name: str,
-    icon_data: dict[str, str],
-    date_str: str,
-    sunder_data: list[tuple[str, int, int]] = None,
-) -> str:
-    """Generate the HTML for the Discord card."""
-    
-    total_copper = sum(x[1] for x in rows)
-    total_deaths = sum(x[2] for x in rows)
-    players = len(rows)
-    
-    avg_cost = total_copper // players if players > 0 else 0
-    zero_death_count = sum(1 for x in rows if x[2] == 0)
-    
-    top_5 = rows[:5]
-    top_spender = rows[0] if rows else ("—", 0, 0)
-    most_deaths = max(rows, key=lambda x: x[2]) if rows else ("—", 0, 0)
-    
-    # Build guild icons HTML
-    guild_icons_html = ""
-    for guild in guild_names:
-        icon_b64 = icon_data.get(guild, "")
-        glow_color = GUILD_CONFIG.get(guild, {}).get("glow_color", "rgba(255,255,255,0.2)")
-        if icon_b64:
-            guild_icons_html += f'''
-          <div class="guild-icon-wrapper">
-            <div class="guild-icon-glow" style="background: radial-gradient(circle, {glow_color} 0%, transparent 70%);"></div>
-            <img class="guild-icon" src="data:image/png;base64,{icon_b64}" alt="{escape(guild)}">
-          </div>'''
-    
-    guild_names_display = '<span class="separator">×</span>'.join(escape(g) for g in guild_names)
-    
-    # Build top 5 spend rows
-    player_rows_html = ""
-    for i, (name, copper, deaths) in enumerate(top_5, start=1):
-        rank_class = f"top-{i}" if i <= 3 else ""
-        player_rows_html += f'''
-          <div class="player-row {rank_class}">
-            <span class="rank">{i}</span>
-            <span class="player-name">{escape(name)}</span>
-            <span class="player-cost">{copper_to_gsc_short(copper)}</span>
-          </div>'''
-    
-    # Build sunder race HTML
-    sunder_html = ""
-    if sunder_data:
-        sorted_sunders = sorted(sunder_data, key=lambda x: x[1] + x[2], reverse=True)[:5]
-        max_total_sunders = (sorted_sunders[0][1] + sorted_sunders[0][2]) if sorted_sunders else 1
-        
-        sunder_rows = ""
-        medals = ["🥇", "🥈", "🥉", "4", "5"]
-        for i, (name, trash, boss) in enumerate(sorted_sunders):
-            total = trash + boss
-            bar_width = int((total / max_total_sunders) * 100) if max_total_sunders > 0 else 0
-            medal = medals[i] if i < len(medals) else str(i + 1)
-            medal_class = f"medal-{i+1}" if i < 3 else ""
-            sunder_rows += f'''
-            <div class="sunder-row">
-              <span class="sunder-medal {medal_class}">{medal}</span>
-              <span class="sunder-name">{escape(name)}</span>
-              <div class="sunder-bar-container">
-                <div class="sunder-bar" style="width: {bar_width}%"></div>
-              </div>
-              <span class="sunder-count">{total}</span>
-            </div>'''
-        
-        sunder_html = f'''
-        <div class="sunder-race">
-          <h3>⚔️ Sunder Race <span class="sunder-subtitle">(total sunders)</span></h3>
-          <div class="sunder-list">
-            {sunder_rows}
-          </div>
-        </div>'''
-    
-    html = f'''<!DOCTYPE html>
+def read_consume_csv(csv_path: Path) -> list[tuple[str, int, int]]:
+    """Read (name, copper, deaths) rows from consumable-totals.csv, unfiltered."""
+    rows = []
+    with csv_path.open("r", encoding="utf-8-sig", newline="", buffering=LOG_BUFFER_SIZE) as f:
+        reader = csv.reader(f, delimiter=",")
+        for line in reader:
+            if len(line) < 2:
+                continue
+            name, copper, *rest = line
+            deaths = rest[0] if rest else "0"
+            # Plain digit fields, the usual case, skip safe_int's cleanup.
+            copper = int(copper) if copper.isdecimal() else safe_int(copper, 0)
+            deaths = int(deaths) if deaths.isdecimal() else safe_int(deaths, 0)
+            rows.append((sys.intern(name.strip()), copper, deaths))
+    return rows
+
+
+# Static <head> of the Discord card; it has no per-raid content.
+_CARD_HEAD = '''<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
@@ -616,9 +814,9 @@ def generate_html(
   <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
   <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@600;700&family=Fira+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
   <style>
-    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+    * { margin: 0; padding: 0; box-sizing: border-box; }
 
-    body {{
+    body {
       width: 1200px;
       height: 630px;
       background: linear-gradient(155deg, #0a0e14 0%, #131922 40%, #0f1419 100%);
@@ -626,9 +824,9 @@ def generate_html(
       color: #e6edf3;
       overflow: hidden;
       position: relative;
-    }}
+    }
 
-    body::before {{
+    body::before {
       content: '';
       position: absolute;
       inset: 0;
@@ -637,42 +835,42 @@ def generate_html(
         radial-gradient(ellipse 60% 40% at 85% 75%, rgba(140, 130, 120, 0.05) 0%, transparent 50%),
         radial-gradient(ellipse 100% 60% at 50% 110%, rgba(80, 60, 40, 0.08) 0%, transparent 60%);
       pointer-events: none;
-    }}
+    }
 
-    .container {{
+    .container {
       padding: 32px 44px;
       height: 100%;
       display: flex;
       flex-direction: column;
       position: relative;
       z-index: 1;
-    }}
+    }
 
-    .header {{
+    .header {
       display: flex;
       justify-content: space-between;
       align-items: flex-start;
       margin-bottom: 20px;
-    }}
+    }
 
-    .header-left {{
+    .header-left {
       display: flex;
       align-items: center;
       gap: 18px;
-    }}
+    }
 
-    .guild-icons {{
+    .guild-icons {
       display: flex;
       gap: 10px;
-    }}
+    }
 
-    .guild-icon-wrapper {{
+    .guild-icon-wrapper {
       position: relative;
       width: 56px;
       height: 56px;
-    }}
+    }
 
-    .guild-icon {{
+    .guild-icon {
       width: 56px;
       height: 56px;
       border-radius: 50%;
@@ -680,44 +878,44 @@ def generate_html(
       filter: drop-shadow(0 4px 12px rgba(0,0,0,0.5));
       -webkit-mask-image: radial-gradient(circle, black 55%, transparent 72%);
       mask-image: radial-gradient(circle, black 55%, transparent 72%);
-    }}
+    }
 
-    .guild-icon-glow {{
+    .guild-icon-glow {
       position: absolute;
       inset: -4px;
       border-radius: 50%;
       filter: blur(8px);
       z-index: -1;
-    }}
+    }
 
-    .title-block {{
+    .title-block {
       display: flex;
       flex-direction: column;
       gap: 3px;
-    }}
+    }
 
-    .guild-names {{
+    .guild-names {
       font-family: 'Cinzel', serif;
       font-size: 28px;
       font-weight: 700;
       color: #f0f6fc;
       letter-spacing: 1px;
       text-shadow: 0 2px 16px rgba(212, 175, 55, 0.25);
-    }}
+    }
 
-    .guild-names .separator {{
+    .guild-names .separator {
       color: #4a5568;
       margin: 0 6px;
       font-weight: 400;
-    }}
+    }
 
-    .raid-subtitle {{
+    .raid-subtitle {
       display: flex;
       align-items: center;
       gap: 10px;
-    }}
+    }
 
-    .raid-badge {{
+    .raid-badge {
       background: linear-gradient(135deg, rgba(139, 92, 246, 0.2) 0%, rgba(139, 92, 246, 0.1) 100%);
       border: 1px solid rgba(139, 92, 246, 0.3);
       padding: 3px 10px;
@@ -727,14 +925,14 @@ def generate_html(
       color: #a78bfa;
       letter-spacing: 1px;
       text-transform: uppercase;
-    }}
+    }
 
-    .date-text {{
+    .date-text {
       font-size: 12px;
       color: #586069;
-    }}
+    }
 
-    .server-badge {{
+    .server-badge {
       background: linear-gradient(135deg, rgba(34, 197, 94, 0.15) 0%, rgba(34, 197, 94, 0.08) 100%);
       border: 1px solid rgba(34, 197, 94, 0.3);
       padding: 8px 18px;
@@ -744,15 +942,15 @@ def generate_html(
       color: #4ade80;
       letter-spacing: 1px;
       text-transform: uppercase;
-    }}
+    }
 
-    .stats-row {{
+    .stats-row {
       display: flex;
       gap: 16px;
       margin-bottom: 20px;
-    }}
+    }
 
-    .stat-card {{
+    .stat-card {
       flex: 1;
       background: rgba(22, 27, 34, 0.7);
       border: 1px solid rgba(48, 54, 61, 0.6);
@@ -760,177 +958,177 @@ def generate_html(
       padding: 14px 18px;
       position: relative;
       overflow: hidden;
-    }}
+    }
 
-    .stat-card::before {{
+    .stat-card::before {
       content: '';
       position: absolute;
       top: 0;
       left: 0;
       right: 0;
       height: 3px;
-    }}
+    }
 
-    .stat-card.gold::before {{ background: linear-gradient(90deg, #ffd700, #f59e0b, #ffd700); }}
-    .stat-card.players::before {{ background: linear-gradient(90deg, #3b82f6, #60a5fa, #3b82f6); }}
-    .stat-card.deaths::before {{ background: linear-gradient(90deg, #ef4444, #f87171, #ef4444); }}
+    .stat-card.gold::before { background: linear-gradient(90deg, #ffd700, #f59e0b, #ffd700); }
+    .stat-card.players::before { background: linear-gradient(90deg, #3b82f6, #60a5fa, #3b82f6); }
+    .stat-card.deaths::before { background: linear-gradient(90deg, #ef4444, #f87171, #ef4444); }
 
-    .stat-label {{
+    .stat-label {
       font-size: 10px;
       color: #6e7681;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 6px;
-    }}
+    }
 
-    .stat-value {{
+    .stat-value {
       font-size: 26px;
       font-weight: 700;
       color: #f0f6fc;
-    }}
+    }
 
-    .stat-value .g {{ color: #ffd700; }}
-    .stat-value .s {{ color: #c0c0c0; }}
-    .stat-value .c {{ color: #cd7f32; }}
+    .stat-value .g { color: #ffd700; }
+    .stat-value .s { color: #c0c0c0; }
+    .stat-value .c { color: #cd7f32; }
 
-    .main-content {{
+    .main-content {
       display: flex;
       gap: 24px;
       flex: 1;
       min-height: 0;
-    }}
+    }
 
-    .leaderboard {{
+    .leaderboard {
       flex: 1.2;
       display: flex;
       flex-direction: column;
-    }}
+    }
 
-    .section-title {{
+    .section-title {
       font-size: 11px;
       color: #6e7681;
       text-transform: uppercase;
       letter-spacing: 2px;
       margin-bottom: 10px;
       font-weight: 600;
-    }}
+    }
 
-    .player-list {{
+    .player-list {
       display: flex;
       flex-direction: column;
       gap: 5px;
-    }}
+    }
 
-    .player-row {{
+    .player-row {
       display: flex;
       align-items: center;
       padding: 10px 14px;
       background: rgba(22, 27, 34, 0.5);
       border-radius: 8px;
       border: 1px solid rgba(48, 54, 61, 0.4);
-    }}
+    }
 
-    .player-row.top-1 {{
+    .player-row.top-1 {
       background: linear-gradient(135deg, rgba(255, 215, 0, 0.12) 0%, rgba(22, 27, 34, 0.7) 100%);
       border-color: rgba(255, 215, 0, 0.25);
-    }}
+    }
 
-    .player-row.top-2 {{
+    .player-row.top-2 {
       background: linear-gradient(135deg, rgba(192, 192, 192, 0.08) 0%, rgba(22, 27, 34, 0.7) 100%);
       border-color: rgba(192, 192, 192, 0.2);
-    }}
+    }
 
-    .player-row.top-3 {{
+    .player-row.top-3 {
       background: linear-gradient(135deg, rgba(205, 127, 50, 0.08) 0%, rgba(22, 27, 34, 0.7) 100%);
       border-color: rgba(205, 127, 50, 0.2);
-    }}
+    }
 
-    .rank {{
+    .rank {
       width: 24px;
       font-size: 13px;
       font-weight: 700;
       color: #586069;
-    }}
+    }
 
-    .top-1 .rank {{ color: #ffd700; }}
-    .top-2 .rank {{ color: #c0c0c0; }}
-    .top-3 .rank {{ color: #cd7f32; }}
+    .top-1 .rank { color: #ffd700; }
+    .top-2 .rank { color: #c0c0c0; }
+    .top-3 .rank { color: #cd7f32; }
 
-    .player-name {{
+    .player-name {
       flex: 1;
       font-weight: 600;
       font-size: 14px;
       color: #e6edf3;
-    }}
+    }
 
-    .player-cost {{
+    .player-cost {
       font-size: 13px;
       font-weight: 500;
       color: #8b949e;
       min-width: 100px;
       text-align: right;
-    }}
+    }
 
-    .top-1 .player-cost {{ color: #ffd700; }}
+    .top-1 .player-cost { color: #ffd700; }
 
-    .middle-column {{
+    .middle-column {
       flex: 0.9;
       display: flex;
       flex-direction: column;
       gap: 10px;
-    }}
+    }
 
-    .highlight-card {{
+    .highlight-card {
       background: rgba(22, 27, 34, 0.6);
       border: 1px solid rgba(48, 54, 61, 0.5);
       border-radius: 10px;
       padding: 12px 14px;
-    }}
+    }
 
-    .highlight-card h3 {{
+    .highlight-card h3 {
       font-size: 9px;
       color: #6e7681;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 6px;
-    }}
+    }
 
-    .highlight-value {{
+    .highlight-value {
       font-size: 14px;
       font-weight: 600;
-    }}
+    }
 
-    .highlight-value .name {{ color: #58a6ff; }}
-    .highlight-value .detail {{ color: #6e7681; font-size: 12px; font-weight: 400; }}
+    .highlight-value .name { color: #58a6ff; }
+    .highlight-value .detail { color: #6e7681; font-size: 12px; font-weight: 400; }
 
-    .fun-stats {{
+    .fun-stats {
       padding: 12px 14px;
       background: rgba(59, 130, 246, 0.06);
       border: 1px solid rgba(59, 130, 246, 0.15);
       border-radius: 10px;
-    }}
+    }
 
-    .fun-stats h3 {{
+    .fun-stats h3 {
       font-size: 9px;
       color: #60a5fa;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 8px;
-    }}
+    }
 
-    .fun-stat-item {{
+    .fun-stat-item {
       font-size: 12px;
       color: #8b949e;
       margin-bottom: 4px;
       display: flex;
       justify-content: space-between;
-    }}
+    }
 
-    .fun-stat-item:last-child {{ margin-bottom: 0; }}
-    .fun-stat-item strong {{ color: #e6edf3; }}
+    .fun-stat-item:last-child { margin-bottom: 0; }
+    .fun-stat-item strong { color: #e6edf3; }
 
     /* Sunder Race */
-    .sunder-race {{
+    .sunder-race {
       flex: 1;
       background: rgba(22, 27, 34, 0.6);
       border: 1px solid rgba(234, 179, 8, 0.2);
@@ -938,48 +1136,48 @@ def generate_html(
       padding: 14px 16px;
       display: flex;
       flex-direction: column;
-    }}
+    }
 
-    .sunder-race h3 {{
+    .sunder-race h3 {
       font-size: 11px;
       color: #eab308;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 12px;
       font-weight: 700;
-    }}
+    }
 
-    .sunder-subtitle {{
+    .sunder-subtitle {
       font-size: 9px;
       color: #6e7681;
       font-weight: 500;
       text-transform: lowercase;
-    }}
+    }
 
-    .sunder-list {{
+    .sunder-list {
       display: flex;
       flex-direction: column;
       gap: 8px;
       flex: 1;
-    }}
+    }
 
-    .sunder-row {{
+    .sunder-row {
       display: flex;
       align-items: center;
       gap: 8px;
-    }}
+    }
 
-    .sunder-medal {{
+    .sunder-medal {
       width: 22px;
       font-size: 14px;
       text-align: center;
-    }}
+    }
 
-    .sunder-medal.medal-1 {{ filter: drop-shadow(0 0 4px rgba(255, 215, 0, 0.5)); }}
-    .sunder-medal.medal-2 {{ filter: drop-shadow(0 0 4px rgba(192, 192, 192, 0.4)); }}
-    .sunder-medal.medal-3 {{ filter: drop-shadow(0 0 4px rgba(205, 127, 50, 0.4)); }}
+    .sunder-medal.medal-1 { filter: drop-shadow(0 0 4px rgba(255, 215, 0, 0.5)); }
+    .sunder-medal.medal-2 { filter: drop-shadow(0 0 4px rgba(192, 192, 192, 0.4)); }
+    .sunder-medal.medal-3 { filter: drop-shadow(0 0 4px rgba(205, 127, 50, 0.4)); }
 
-    .sunder-name {{
+    .sunder-name {
       width: 90px;
       font-size: 12px;
       font-weight: 600;
@@ -987,32 +1185,32 @@ def generate_html(
       white-space: nowrap;
       overflow: hidden;
       text-overflow: ellipsis;
-    }}
+    }
 
-    .sunder-bar-container {{
+    .sunder-bar-container {
       flex: 1;
       height: 16px;
       background: rgba(48, 54, 61, 0.5);
       border-radius: 8px;
       overflow: hidden;
-    }}
+    }
 
-    .sunder-bar {{
+    .sunder-bar {
       height: 100%;
       background: linear-gradient(90deg, #eab308 0%, #f59e0b 50%, #fbbf24 100%);
       border-radius: 8px;
       box-shadow: 0 0 10px rgba(234, 179, 8, 0.3);
-    }}
+    }
 
-    .sunder-count {{
+    .sunder-count {
       width: 40px;
       font-size: 13px;
       font-weight: 700;
       color: #fbbf24;
       text-align: right;
-    }}
+    }
 
-    .footer {{
+    .footer {
       margin-top: 16px;
       padding-top: 12px;
       border-top: 1px solid rgba(48, 54, 61, 0.4);
@@ -1020,62 +1218,65 @@ def generate_html(
       justify-content: space-between;
       font-size: 10px;
       color: #484f58;
-    }}
+    }
   </style>
 </head>
-<body>
+'''
+
+# Card <body>, filled in by iter_card_html via substitute().
+_CARD_BODY = Template('''<body>
   <div class="container">
     <div class="header">
       <div class="header-left">
-        <div class="guild-icons">{guild_icons_html}</div>
+        <div class="guild-icons">${guild_icons_html}</div>
         <div class="title-block">
-          <div class="guild-names">{guild_names_display}</div>
+          <div class="guild-names">${guild_names_display}</div>
           <div class="raid-subtitle">
-            <span class="raid-badge">{escape(raid_name)}</span>
-            <span class="date-text">{escape(date_str)}</span>
+            <span class="raid-badge">${raid_name}</span>
+            <span class="date-text">${date_str}</span>
           </div>
         </div>
       </div>
-      <div class="server-badge">{escape(server_name)}</div>
+      <div class="server-badge">${server_name}</div>
     </div>
 
     <div class="stats-row">
       <div class="stat-card gold">
         <div class="stat-label">Total Raid Cost</div>
         <div class="stat-value">
-          <span class="g">{copper_to_gold_rounded(total_copper)}</span>g
+          <span class="g">${total_gold}</span>g
         </div>
       </div>
       <div class="stat-card players">
         <div class="stat-label">Raiders</div>
-        <div class="stat-value">{players}</div>
+        <div class="stat-value">${players}</div>
       </div>
       <div class="stat-card deaths">
         <div class="stat-label">Deaths</div>
-        <div class="stat-value">{total_deaths}</div>
+        <div class="stat-value">${total_deaths}</div>
       </div>
     </div>
 
     <div class="main-content">
       <div class="leaderboard">
         <div class="section-title">Top Spenders</div>
-        <div class="player-list">{player_rows_html}</div>
+        <div class="player-list">${player_rows_html}</div>
       </div>
 
       <div class="middle-column">
         <div class="highlight-card">
           <h3>💰 Big Spender</h3>
           <div class="highlight-value">
-            <span class="name">{escape(top_spender[0])}</span>
-            <span class="detail"> — {copper_to_gsc_short(top_spender[1])}</span>
+            <span class="name">${top_spender_name}</span>
+            <span class="detail"> — ${top_spender_cost}</span>
           </div>
         </div>
 
         <div class="highlight-card">
           <h3>💀 Most Deaths</h3>
           <div class="highlight-value">
-            <span class="name">{escape(most_deaths[0])}</span>
-            <span class="detail"> — {most_deaths[2]} death{"s" if most_deaths[2] != 1 else ""}</span>
+            <span class="name">${most_deaths_name}</span>
+            <span class="detail"> — ${most_deaths_count} death${most_deaths_plural}</span>
           </div>
         </div>
 
@@ -1083,156 +1284,181 @@ def generate_html(
           <h3>📊 Raid Stats</h3>
           <div class="fun-stat-item">
             <span>Avg cost per raider</span>
-            <strong>{copper_to_gsc_short(avg_cost)}</strong>
+            <strong>${avg_cost}</strong>
           </div>
           <div class="fun-stat-item">
             <span>Zero-death raiders</span>
-            <strong>{zero_death_count}/{players}</strong>
+            <strong>${zero_death_count}/${players}</strong>
           </div>
         </div>
       </div>
 
-      {sunder_html}
+      ${sunder_html}
     </div>
 
     <div class="footer">
       <span>Generated by summarize_consumes</span>
-      <span>Prices: {escape(server_name)} AH</span>
+      <span>Prices: ${server_name} AH</span>
     </div>
   </div>
 </body>
-</html>'''
-    
-    return html
+</html>''')
+
+
+def summarize_rows(rows: list[tuple[str, int, int]]) -> tuple[int, int, int, tuple[str, int, int]]:
+    """
+    Return (total copper, total deaths, zero-death count, most-deaths row) in
+    one pass over rows. Like max(), the first row with the most deaths wins.
+    """
+    total_copper = total_deaths = zero_death_count = 0
+    most_deaths = None
+    for row in rows:
+        _, copper, deaths = row
+        total_copper += copper
+        total_deaths += deaths
+        if deaths == 0:
+            zero_death_count += 1
+        if most_deaths is None or deaths > most_deaths[2]:
+            most_deaths = row
+    return total_copper, total_deaths, zero_death_count, most_deaths or ("—", 0, 0)
+
+
+# Sunder race placings: label and CSS class for each of the top ten.
+_MEDALS = ("🥇", "🥈", "🥉") + tuple(str(i) for i in range(4, 11))
+_MEDAL_CLASSES = ("medal-1", "medal-2", "medal-3") + ("",) * 7
+# Plural suffix, indexed by "count == 1".
+_PLURAL = ("s", "")
+
+
+# Repeated card fragments, filled in by iter_card_html; the sunder row is
+# shared with the full report.
+_CARD_PLAYER_ROW = Template('''
+          <div class="player-row ${rank_class}">
+            <span class="rank">${rank}</span>
+            <span class="player-name">${name}</span>
+            <span class="player-cost">${cost}</span>
+          </div>''')
+
+_SUNDER_ROW = Template('''
+            <div class="sunder-row">
+              <span class="sunder-medal ${medal_class}">${medal}</span>
+              <span class="sunder-name">${name}</span>
+              <div class="sunder-bar-container">
+                <div class="sunder-bar" style="width: ${bar_width}%"></div>
+              </div>
+              <span class="sunder-count">${total}</span>
+            </div>''')
+
+_CARD_SUNDER_RACE = Template('''
+        <div class="sunder-race">
+          <h3>⚔️ Sunder Race <span class="sunder-subtitle">(total sunders)</span></h3>
+          <div class="sunder-list">
+            ${sunder_rows}
+          </div>
+        </div>''')
 
 
-def generate_full_report_html(
+def iter_card_html(
     rows: list[tuple[str, int, int]],
     guild_names: list[str],
     raid_name: str,
     server_name: str,
     icon_data: dict[str, str],
     date_str: str,
-    sunder_data: list[tuple[str, int, int]] | None,
-    death_breakdown: dict[str, dict[str, int]],
-    healthstone_uses: dict[str, int],
-    orange_uses: dict[str, int],
-    resurrection_casts: dict[str, int],
-) -> str:
-    total_copper = sum(x[1] for x in rows)
-    total_deaths = sum(x[2] for x in rows)
+    sunder_data: list[tuple[str, int, int]] = None,
+    totals: tuple[int, int, int, tuple[str, int, int]] | None = None,
+) -> Iterator[str]:
+    """
+    Generate the HTML for the Discord card, one large segment at a time.
+    rows must already be sorted by copper, highest first.
+    totals is summarize_rows(rows), when the caller already has it.
+    """
+    
+    total_copper, total_deaths, zero_death_count, most_deaths = totals or summarize_rows(rows)
     players = len(rows)
+    
     avg_cost = total_copper // players if players > 0 else 0
-    zero_death_count = sum(1 for x in rows if x[2] == 0)
-
+    
+    top_5 = rows[:5]
     top_spender = rows[0] if rows else ("—", 0, 0)
-    most_deaths = max(rows, key=lambda x: x[2]) if rows else ("—", 0, 0)
-    top_orange = max(orange_uses.items(), key=lambda x: x[1]) if orange_uses else ("—", 0)
-    top_boss_deaths = (
-        max(death_breakdown.items(), key=lambda x: x[1]["boss"])
-        if death_breakdown
-        else ("—", {"boss": 0})
-    )
-    top_trash_deaths = (
-        max(death_breakdown.items(), key=lambda x: x[1]["trash"])
-        if death_breakdown
-        else ("—", {"trash": 0})
-    )
-    top_healthstones = (
-        max(healthstone_uses.items(), key=lambda x: x[1])
-        if healthstone_uses
-        else ("—", 0)
-    )
-    top_resurrections = (
-        max(resurrection_casts.items(), key=lambda x: x[1])
-        if resurrection_casts
-        else ("—", 0)
+    
+    # Build guild icons HTML
+    guild_icons_html = build_guild_icons_html(guild_names, icon_data)
+    
+    guild_names_display = format_guild_names(tuple(guild_names))
+    
+    # Build top 5 spend rows
+    player_rows_html = "".join(
+        _CARD_PLAYER_ROW.substitute(
+            rank_class=f"top-{i}" if i <= 3 else "",
+            rank=i,
+            name=_esc(name),
+            cost=copper_to_gsc_short(copper),
+        )
+        for i, (name, copper, deaths) in enumerate(top_5, start=1)
     )
-
-    guild_icons_html = ""
-    for guild in guild_names:
-        icon_b64 = icon_data.get(guild, "")
-        glow_color = GUILD_CONFIG.get(guild, {}).get("glow_color", "rgba(255,255,255,0.2)")
-        if icon_b64:
-            guild_icons_html += f'''
-          <div class="guild-icon-wrapper">
-            <div class="guild-icon-glow" style="background: radial-gradient(circle, {glow_color} 0%, transparent 70%);"></div>
-            <img class="guild-icon" src="data:image/png;base64,{icon_b64}" alt="{escape(guild)}">
-          </div>'''
-
-    guild_names_display = '<span class="separator">×</span>'.join(escape(g) for g in guild_names)
-
+    
+    # Build sunder race HTML
     sunder_html = ""
     if sunder_data:
-        sorted_sunders = sorted(sunder_data, key=lambda x: x[1] + x[2], reverse=True)[:10]
+        sorted_sunders = heapq.nlargest(5, sunder_data, key=lambda x: x[1] + x[2])
         max_total_sunders = (sorted_sunders[0][1] + sorted_sunders[0][2]) if sorted_sunders else 1
-        sunder_rows = ""
-        medals = ["🥇", "🥈", "🥉"] + [str(i) for i in range(4, 11)]
-        for i, (name, trash, boss) in enumerate(sorted_sunders):
+        
+        sunder_rows = []
+        for medal, medal_class, (name, trash, boss) in zip(_MEDALS, _MEDAL_CLASSES, sorted_sunders):
             total = trash + boss
-            bar_width = int((total / max_total_sunders) * 100) if max_total_sunders > 0 else 0
-            medal = medals[i] if i < len(medals) else str(i + 1)
-            medal_class = f"medal-{i+1}" if i < 3 else ""
-            sunder_rows += f'''
-            <div class="sunder-row">
-              <span class="sunder-medal {medal_class}">{medal}</span>
-              <span class="sunder-name">{escape(name)}</span>
-              <div class="sunder-bar-container">
-                <div class="sunder-bar" style="width: {bar_width}%"></div>
-              </div>
-              <span class="sunder-count">{total}</span>
-            </div>'''
+            bar_width = total * 100 // max_total_sunders if max_total_sunders > 0 else 0
+            sunder_rows.append(_SUNDER_ROW.substitute(
+                medal_class=medal_class,
+                medal=medal,
+                name=_esc(name),
+                bar_width=bar_width,
+                total=total,
+            ))
+        
+        sunder_html = _CARD_SUNDER_RACE.substitute(sunder_rows="".join(sunder_rows))
+    
+    yield _CARD_HEAD
+    yield _CARD_BODY.substitute(
+        guild_icons_html=guild_icons_html,
+        guild_names_display=guild_names_display,
+        raid_name=_esc(raid_name),
+        date_str=_esc(date_str),
+        server_name=_esc(server_name),
+        total_gold=copper_to_gold_rounded(total_copper),
+        players=players,
+        total_deaths=total_deaths,
+        player_rows_html=player_rows_html,
+        top_spender_name=_esc(top_spender[0]),
+        top_spender_cost=copper_to_gsc_short(top_spender[1]),
+        most_deaths_name=_esc(most_deaths[0]),
+        most_deaths_count=most_deaths[2],
+        most_deaths_plural=_PLURAL[most_deaths[2] == 1],
+        avg_cost=copper_to_gsc_short(avg_cost),
+        zero_death_count=zero_death_count,
+        sunder_html=sunder_html,
+    )
 
-        sunder_html = f'''
-        <div class="sunder-race full">
-          <h3>⚔️ Sunder Race <span class="sunder-subtitle">(total sunders)</span></h3>
-          <div class="sunder-list">
-            {sunder_rows}
-          </div>
-        </div>'''
 
-    table_rows = ""
-    for i, (name, copper, deaths) in enumerate(rows, start=1):
-        breakdown = death_breakdown.get(name, {"total": deaths, "boss": 0, "trash": 0})
-        healthstones = healthstone_uses.get(name, 0)
-        oranges = orange_uses.get(name, 0)
-        resurrections = resurrection_casts.get(name, 0)
-        sort_name = escape(name.lower())
-        table_rows += f"""
-          <tr>
-            <td class="num" data-value="{i}">{i}</td>
-            <td class="player-name" data-value="{sort_name}">{escape(name)}</td>
-            <td class="num stat-cell" data-value="{copper}"><span class="badge badge-gold">💰 {copper_to_gsc_short(copper)}</span></td>
-            <td class="num stat-cell" data-value="{breakdown['total']}"><span class="badge badge-total">💀 {breakdown['total']}</span></td>
-            <td class="num stat-cell" data-value="{breakdown['boss']}"><span class="badge badge-boss">👹 {breakdown['boss']}</span></td>
-            <td class="num stat-cell" data-value="{breakdown['trash']}"><span class="badge badge-trash">🗑️ {breakdown['trash']}</span></td>
-            <td class="num stat-cell" data-value="{healthstones}"><span class="badge badge-healthstone">🟢 {healthstones}</span></td>
-            <td class="num stat-cell" data-value="{oranges}"><span class="badge badge-orange">🍊 {oranges}</span></td>
-            <td class="num stat-cell" data-value="{resurrections}"><span class="badge badge-res">😇 {resurrections}</span></td>
-          </tr>
-        """
+def write_html(path: Path, segments: Iterable[str]) -> None:
+    """Write HTML segments straight to disk without joining them first."""
+    with path.open("w", encoding="utf-8", buffering=LOG_BUFFER_SIZE) as out:
+        out.writelines(segments)
 
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=1200">
-  <title>Raid Consume Report</title>
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-  <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@600;700&family=Fira+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
-  <style>
-    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
 
-    body {{
+# Static stylesheet and table-sorting script of the full report. They are
+# plain strings, spliced into the page as-is.
+_FULL_REPORT_CSS = '''    * { margin: 0; padding: 0; box-sizing: border-box; }
+
+    body {
       width: 1200px;
       background: linear-gradient(155deg, #0a0e14 0%, #131922 40%, #0f1419 100%);
       font-family: 'Fira Sans', sans-serif;
       color: #e6edf3;
       position: relative;
-    }}
+    }
 
-    body::before {{
+    body::before {
       content: '';
       position: absolute;
       inset: 0;
@@ -1241,39 +1467,39 @@ def generate_full_report_html(
         radial-gradient(ellipse 60% 40% at 85% 75%, rgba(140, 130, 120, 0.05) 0%, transparent 50%),
         radial-gradient(ellipse 100% 60% at 50% 110%, rgba(80, 60, 40, 0.08) 0%, transparent 60%);
       pointer-events: none;
-    }}
+    }
 
-    .container {{
+    .container {
       padding: 32px 44px 48px;
       position: relative;
       z-index: 1;
-    }}
+    }
 
-    .header {{
+    .header {
       display: flex;
       justify-content: space-between;
       align-items: flex-start;
       margin-bottom: 20px;
-    }}
+    }
 
-    .header-left {{
+    .header-left {
       display: flex;
       align-items: center;
       gap: 18px;
-    }}
+    }
 
-    .guild-icons {{
+    .guild-icons {
       display: flex;
       gap: 10px;
-    }}
+    }
 
-    .guild-icon-wrapper {{
+    .guild-icon-wrapper {
       position: relative;
       width: 56px;
       height: 56px;
-    }}
+    }
 
-    .guild-icon {{
+    .guild-icon {
       width: 56px;
       height: 56px;
       border-radius: 50%;
@@ -1281,44 +1507,44 @@ def generate_full_report_html(
       filter: drop-shadow(0 4px 12px rgba(0,0,0,0.5));
       -webkit-mask-image: radial-gradient(circle, black 55%, transparent 72%);
       mask-image: radial-gradient(circle, black 55%, transparent 72%);
-    }}
+    }
 
-    .guild-icon-glow {{
+    .guild-icon-glow {
       position: absolute;
       inset: -4px;
       border-radius: 50%;
       filter: blur(8px);
       z-index: -1;
-    }}
+    }
 
-    .title-block {{
+    .title-block {
       display: flex;
       flex-direction: column;
       gap: 3px;
-    }}
+    }
 
-    .guild-names {{
+    .guild-names {
       font-family: 'Cinzel', serif;
       font-size: 28px;
       font-weight: 700;
       color: #f0f6fc;
       letter-spacing: 1px;
       text-shadow: 0 2px 16px rgba(212, 175, 55, 0.25);
-    }}
+    }
 
-    .guild-names .separator {{
+    .guild-names .separator {
       color: #4a5568;
       margin: 0 6px;
       font-weight: 400;
-    }}
+    }
 
-    .raid-subtitle {{
+    .raid-subtitle {
       display: flex;
       align-items: center;
       gap: 10px;
-    }}
+    }
 
-    .raid-badge {{
+    .raid-badge {
       background: linear-gradient(135deg, rgba(139, 92, 246, 0.2) 0%, rgba(139, 92, 246, 0.1) 100%);
       border: 1px solid rgba(139, 92, 246, 0.3);
       padding: 3px 10px;
@@ -1328,14 +1554,14 @@ def generate_full_report_html(
       color: #a78bfa;
       letter-spacing: 1px;
       text-transform: uppercase;
-    }}
+    }
 
-    .date-text {{
+    .date-text {
       font-size: 12px;
       color: #586069;
-    }}
+    }
 
-    .server-badge {{
+    .server-badge {
       background: linear-gradient(135deg, rgba(34, 197, 94, 0.15) 0%, rgba(34, 197, 94, 0.08) 100%);
       border: 1px solid rgba(34, 197, 94, 0.3);
       padding: 8px 18px;
@@ -1345,15 +1571,15 @@ def generate_full_report_html(
       color: #4ade80;
       letter-spacing: 1px;
       text-transform: uppercase;
-    }}
+    }
 
-    .stats-row {{
+    .stats-row {
       display: flex;
       gap: 16px;
       margin-bottom: 20px;
-    }}
+    }
 
-    .stat-card {{
+    .stat-card {
       flex: 1;
       background: rgba(22, 27, 34, 0.7);
       border: 1px solid rgba(48, 54, 61, 0.6);
@@ -1361,161 +1587,161 @@ def generate_full_report_html(
       padding: 14px 18px;
       position: relative;
       overflow: hidden;
-    }}
+    }
 
-    .stat-card::before {{
+    .stat-card::before {
       content: '';
       position: absolute;
       top: 0;
       left: 0;
       right: 0;
       height: 3px;
-    }}
+    }
 
-    .stat-card.gold::before {{ background: linear-gradient(90deg, #ffd700, #f59e0b, #ffd700); }}
-    .stat-card.players::before {{ background: linear-gradient(90deg, #3b82f6, #60a5fa, #3b82f6); }}
-    .stat-card.deaths::before {{ background: linear-gradient(90deg, #ef4444, #f87171, #ef4444); }}
+    .stat-card.gold::before { background: linear-gradient(90deg, #ffd700, #f59e0b, #ffd700); }
+    .stat-card.players::before { background: linear-gradient(90deg, #3b82f6, #60a5fa, #3b82f6); }
+    .stat-card.deaths::before { background: linear-gradient(90deg, #ef4444, #f87171, #ef4444); }
 
-    .stat-label {{
+    .stat-label {
       font-size: 10px;
       color: #6e7681;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 6px;
-    }}
+    }
 
-    .stat-value {{
+    .stat-value {
       font-size: 26px;
       font-weight: 700;
       color: #f0f6fc;
-    }}
+    }
 
-    .stat-value .g {{ color: #ffd700; }}
-    .stat-value .s {{ color: #c0c0c0; }}
-    .stat-value .c {{ color: #cd7f32; }}
+    .stat-value .g { color: #ffd700; }
+    .stat-value .s { color: #c0c0c0; }
+    .stat-value .c { color: #cd7f32; }
 
-    .main-content {{
+    .main-content {
       display: grid;
       grid-template-columns: 1.1fr 0.9fr;
       gap: 24px;
       margin-bottom: 24px;
-    }}
+    }
 
-    .panel {{
+    .panel {
       background: rgba(22, 27, 34, 0.6);
       border: 1px solid rgba(48, 54, 61, 0.5);
       border-radius: 12px;
       padding: 16px;
-    }}
+    }
 
-    .section-title {{
+    .section-title {
       font-size: 11px;
       color: #6e7681;
       text-transform: uppercase;
       letter-spacing: 2px;
       margin-bottom: 12px;
       font-weight: 600;
-    }}
+    }
 
-    .highlight-grid {{
+    .highlight-grid {
       display: grid;
       gap: 12px;
-    }}
+    }
 
-    .highlight-card h3 {{
+    .highlight-card h3 {
       font-size: 9px;
       color: #6e7681;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 6px;
-    }}
+    }
 
-    .highlight-value {{
+    .highlight-value {
       font-size: 14px;
       font-weight: 600;
-    }}
+    }
 
-    .highlight-value .name {{ color: #58a6ff; }}
-    .highlight-value .detail {{ color: #6e7681; font-size: 12px; font-weight: 400; }}
+    .highlight-value .name { color: #58a6ff; }
+    .highlight-value .detail { color: #6e7681; font-size: 12px; font-weight: 400; }
 
-    .fun-stats {{
+    .fun-stats {
       padding: 12px 14px;
       background: rgba(59, 130, 246, 0.06);
       border: 1px solid rgba(59, 130, 246, 0.15);
       border-radius: 10px;
-    }}
+    }
 
-    .fun-stats h3 {{
+    .fun-stats h3 {
       font-size: 9px;
       color: #60a5fa;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 8px;
-    }}
+    }
 
-    .fun-stat-item {{
+    .fun-stat-item {
       font-size: 12px;
       color: #8b949e;
       margin-bottom: 4px;
       display: flex;
       justify-content: space-between;
-    }}
+    }
 
-    .fun-stat-item:last-child {{ margin-bottom: 0; }}
-    .fun-stat-item strong {{ color: #e6edf3; }}
+    .fun-stat-item:last-child { margin-bottom: 0; }
+    .fun-stat-item strong { color: #e6edf3; }
 
-    .sunder-race.full {{
+    .sunder-race.full {
       margin-top: 12px;
-    }}
+    }
 
-    .sunder-race {{
+    .sunder-race {
       background: rgba(22, 27, 34, 0.6);
       border: 1px solid rgba(234, 179, 8, 0.2);
       border-radius: 12px;
       padding: 14px 16px;
       display: flex;
       flex-direction: column;
-    }}
+    }
 
-    .sunder-race h3 {{
+    .sunder-race h3 {
       font-size: 11px;
       color: #eab308;
       text-transform: uppercase;
       letter-spacing: 1.5px;
       margin-bottom: 12px;
       font-weight: 700;
-    }}
+    }
 
-    .sunder-subtitle {{
+    .sunder-subtitle {
       font-size: 9px;
       color: #6e7681;
       font-weight: 500;
       text-transform: lowercase;
-    }}
+    }
 
-    .sunder-list {{
+    .sunder-list {
       display: flex;
       flex-direction: column;
       gap: 8px;
-    }}
+    }
 
-    .sunder-row {{
+    .sunder-row {
       display: flex;
       align-items: center;
       gap: 8px;
-    }}
+    }
 
-    .sunder-medal {{
+    .sunder-medal {
       width: 22px;
       font-size: 14px;
       text-align: center;
-    }}
+    }
 
-    .sunder-medal.medal-1 {{ filter: drop-shadow(0 0 4px rgba(255, 215, 0, 0.5)); }}
-    .sunder-medal.medal-2 {{ filter: drop-shadow(0 0 4px rgba(192, 192, 192, 0.4)); }}
-    .sunder-medal.medal-3 {{ filter: drop-shadow(0 0 4px rgba(205, 127, 50, 0.4)); }}
+    .sunder-medal.medal-1 { filter: drop-shadow(0 0 4px rgba(255, 215, 0, 0.5)); }
+    .sunder-medal.medal-2 { filter: drop-shadow(0 0 4px rgba(192, 192, 192, 0.4)); }
+    .sunder-medal.medal-3 { filter: drop-shadow(0 0 4px rgba(205, 127, 50, 0.4)); }
 
-    .sunder-name {{
+    .sunder-name {
       width: 90px;
       font-size: 12px;
       font-weight: 600;
@@ -1523,114 +1749,114 @@ def generate_full_report_html(
       white-space: nowrap;
       overflow: hidden;
       text-overflow: ellipsis;
-    }}
+    }
 
-    .sunder-bar-container {{
+    .sunder-bar-container {
       flex: 1;
       height: 16px;
       background: rgba(48, 54, 61, 0.5);
       border-radius: 8px;
       overflow: hidden;
-    }}
+    }
 
-    .sunder-bar {{
+    .sunder-bar {
       height: 100%;
       background: linear-gradient(90deg, #eab308 0%, #f59e0b 50%, #fbbf24 100%);
       border-radius: 8px;
       box-shadow: 0 0 10px rgba(234, 179, 8, 0.3);
-    }}
+    }
 
-    .sunder-count {{
+    .sunder-count {
       width: 40px;
       font-size: 13px;
       font-weight: 700;
       color: #fbbf24;
       text-align: right;
-    }}
+    }
 
-    .table-card {{
+    .table-card {
       background: rgba(22, 27, 34, 0.75);
       border: 1px solid rgba(48, 54, 61, 0.6);
       border-radius: 14px;
       padding: 16px;
       box-shadow: 0 12px 24px rgba(0, 0, 0, 0.25);
-    }}
+    }
 
-    table {{
+    table {
       width: 100%;
       border-collapse: collapse;
       font-size: 12px;
       table-layout: auto;
-    }}
+    }
 
-    col.col-rank {{
+    col.col-rank {
       width: 4ch;
-    }}
+    }
 
-    col.col-name {{
+    col.col-name {
       width: auto;
-    }}
+    }
 
-    col.col-stat {{
+    col.col-stat {
       width: 12ch;
-    }}
+    }
 
-    th, td {{
+    th, td {
       padding: 10px 8px;
       text-align: left;
       border-bottom: 1px solid rgba(48, 54, 61, 0.6);
       overflow: hidden;
       text-overflow: ellipsis;
-    }}
+    }
 
-    th {{
+    th {
       text-transform: uppercase;
       letter-spacing: 1.5px;
       font-size: 10px;
       color: #8b949e;
       background: rgba(13, 17, 23, 0.85);
-    }}
+    }
 
-    th.sortable {{
+    th.sortable {
       cursor: pointer;
       user-select: none;
-    }}
+    }
 
-    th.sortable::after {{
+    th.sortable::after {
       content: '⇅';
       font-size: 9px;
       margin-left: 6px;
       color: rgba(139, 148, 158, 0.5);
-    }}
+    }
 
-    th.sortable.sorted-asc::after {{
+    th.sortable.sorted-asc::after {
       content: '↑';
       color: #60a5fa;
-    }}
+    }
 
-    th.sortable.sorted-desc::after {{
+    th.sortable.sorted-desc::after {
       content: '↓';
       color: #60a5fa;
-    }}
+    }
 
-    td.num {{
+    td.num {
       font-variant-numeric: tabular-nums;
-    }}
+    }
 
-    td.stat-cell {{
+    td.stat-cell {
       white-space: nowrap;
       text-align: center;
-    }}
+    }
 
-    tbody tr:nth-child(odd) {{
+    tbody tr:nth-child(odd) {
       background: rgba(22, 27, 34, 0.55);
-    }}
+    }
 
-    tbody tr:hover {{
+    tbody tr:hover {
       background: rgba(56, 139, 253, 0.08);
-    }}
+    }
 
-    .badge {{
+    .badge {
       display: inline-flex;
       align-items: center;
       gap: 6px;
@@ -1641,51 +1867,51 @@ def generate_full_report_html(
       color: #e6edf3;
       background: rgba(30, 41, 59, 0.7);
       border: 1px solid rgba(71, 85, 105, 0.6);
-    }}
+    }
 
-    .badge-total {{
+    .badge-total {
       background: rgba(239, 68, 68, 0.15);
       border-color: rgba(239, 68, 68, 0.35);
       color: #fca5a5;
-    }}
+    }
 
-    .badge-boss {{
+    .badge-boss {
       background: rgba(139, 92, 246, 0.15);
       border-color: rgba(139, 92, 246, 0.35);
       color: #c4b5fd;
-    }}
+    }
 
-    .badge-trash {{
+    .badge-trash {
       background: rgba(56, 189, 248, 0.15);
       border-color: rgba(56, 189, 248, 0.35);
       color: #7dd3fc;
-    }}
+    }
 
-    .badge-healthstone {{
+    .badge-healthstone {
       background: rgba(34, 197, 94, 0.15);
       border-color: rgba(34, 197, 94, 0.35);
       color: #86efac;
-    }}
+    }
 
-    .badge-orange {{
+    .badge-orange {
       background: rgba(249, 115, 22, 0.18);
       border-color: rgba(249, 115, 22, 0.4);
       color: #fdba74;
-    }}
+    }
 
-    .badge-res {{
+    .badge-res {
       background: rgba(191, 219, 254, 0.2);
       border-color: rgba(147, 197, 253, 0.45);
       color: #bfdbfe;
-    }}
+    }
 
-    .badge-gold {{
+    .badge-gold {
       background: rgba(245, 158, 11, 0.18);
       border-color: rgba(245, 158, 11, 0.4);
       color: #fcd34d;
-    }}
+    }
 
-    .footer {{
+    .footer {
       margin-top: 16px;
       padding-top: 12px;
       border-top: 1px solid rgba(48, 54, 61, 0.4);
@@ -1693,8 +1919,205 @@ def generate_full_report_html(
       justify-content: space-between;
       font-size: 10px;
       color: #484f58;
-    }}
-  </style>
+    }
+'''
+
+_FULL_REPORT_SCRIPT = '''    (function () {
+      const table = document.querySelector('.raid-table');
+      if (!table) return;
+      const headers = Array.from(table.querySelectorAll('th.sortable'));
+      const tbody = table.querySelector('tbody');
+
+      const clearSortIndicators = () => {
+        headers.forEach((header) => {
+          header.classList.remove('sorted-asc', 'sorted-desc');
+        });
+      };
+
+      const sortRows = (columnIndex, type, direction) => {
+        const rows = Array.from(tbody.querySelectorAll('tr'));
+        const multiplier = direction === 'asc' ? 1 : -1;
+        rows.sort((a, b) => {
+          const aCell = a.children[columnIndex];
+          const bCell = b.children[columnIndex];
+          const aValue = aCell?.dataset.value ?? aCell?.textContent.trim();
+          const bValue = bCell?.dataset.value ?? bCell?.textContent.trim();
+          if (type === 'number') {
+            return (Number(aValue) - Number(bValue)) * multiplier;
+          }
+          return String(aValue).localeCompare(String(bValue)) * multiplier;
+        });
+        rows.forEach((row) => tbody.appendChild(row));
+      };
+
+      headers.forEach((header) => {
+        header.addEventListener('click', () => {
+          const columnIndex = header.cellIndex;
+          const type = header.dataset.type || 'text';
+          const isDesc = header.classList.contains('sorted-desc');
+          const direction = isDesc ? 'asc' : 'desc';
+          clearSortIndicators();
+          header.classList.add(direction === 'asc' ? 'sorted-asc' : 'sorted-desc');
+          sortRows(columnIndex, type, direction);
+        });
+      });
+    })();
+'''
+
+
+# One raider's row in the full report table, filled in by _iter_full_report_rows
+_FULL_REPORT_ROW = Template('''
+          <tr>
+            <td class="num" data-value="${i}">${i}</td>
+            <td class="player-name" data-value="${sort_name}">${name}</td>
+            <td class="num stat-cell" data-value="${copper}"><span class="badge badge-gold">💰 ${gold}g</span></td>
+            <td class="num stat-cell" data-value="${total}"><span class="badge badge-total">💀 ${total}</span></td>
+            <td class="num stat-cell" data-value="${boss}"><span class="badge badge-boss">👹 ${boss}</span></td>
+            <td class="num stat-cell" data-value="${trash}"><span class="badge badge-trash">🗑️ ${trash}</span></td>
+            <td class="num stat-cell" data-value="${healthstones}"><span class="badge badge-healthstone">🟢 ${healthstones}</span></td>
+            <td class="num stat-cell" data-value="${oranges}"><span class="badge badge-orange">🍊 ${oranges}</span></td>
+            <td class="num stat-cell" data-value="${resurrections}"><span class="badge badge-res">😇 ${resurrections}</span></td>
+          </tr>
+        ''')
+
+
+def _iter_full_report_rows(
+    rows: list[tuple[str, int, int]],
+    sort_names: dict[str, str],
+    escaped_names: dict[str, str],
+    death_breakdown: dict[str, dict[str, int]],
+    healthstone_uses: dict[str, int],
+    orange_uses: dict[str, int],
+    resurrection_casts: dict[str, int],
+) -> Iterator[str]:
+    """Render the full report's table rows; all lookups are bound to locals."""
+    breakdown_get = death_breakdown.get
+    healthstones_get = healthstone_uses.get
+    oranges_get = orange_uses.get
+    resurrections_get = resurrection_casts.get
+    render_row = _FULL_REPORT_ROW.substitute
+    for i, (name, copper, deaths) in enumerate(rows, start=1):
+        # Raiders missing from the breakdown fall back to their CSV deaths.
+        breakdown = breakdown_get(name)
+        if breakdown is None:
+            total, boss, trash = deaths, 0, 0
+        else:
+            total, boss, trash = breakdown["total"], breakdown["boss"], breakdown["trash"]
+        yield render_row(
+            i=i,
+            sort_name=sort_names[name],
+            name=escaped_names[name],
+            copper=copper,
+            gold=copper_to_gold_rounded(copper),
+            total=total,
+            boss=boss,
+            trash=trash,
+            healthstones=healthstones_get(name, 0),
+            oranges=oranges_get(name, 0),
+            resurrections=resurrections_get(name, 0),
+        )
+
+
+def iter_full_report_html(
+    rows: list[tuple[str, int, int]],
+    guild_names: list[str],
+    raid_name: str,
+    server_name: str,
+    icon_data: dict[str, str],
+    date_str: str,
+    sunder_data: list[tuple[str, int, int]] | None,
+    death_breakdown: dict[str, dict[str, int]],
+    healthstone_uses: dict[str, int],
+    orange_uses: dict[str, int],
+    resurrection_casts: dict[str, int],
+    totals: tuple[int, int, int, tuple[str, int, int]] | None = None,
+) -> Iterator[str]:
+    """
+    Generate the full report page: the prelude, each table row, then the tail.
+    rows must already be sorted by copper, highest first; the first row is
+    taken as the top spender and the table is numbered in that order.
+    totals is summarize_rows(rows), when the caller already has it.
+    """
+    total_copper, total_deaths, zero_death_count, most_deaths = totals or summarize_rows(rows)
+    players = len(rows)
+    avg_cost = total_copper // players if players > 0 else 0
+
+    top_spender = rows[0] if rows else ("—", 0, 0)
+    top_orange = max(orange_uses.items(), key=itemgetter(1)) if orange_uses else ("—", 0)
+
+    # Boss and trash leaders in one walk over the breakdown. Each dict is
+    # walked in its own order so ties go to the same player max() picked.
+    top_boss_deaths = ("—", {"boss": 0})
+    top_trash_deaths = ("—", {"trash": 0})
+    if death_breakdown:
+        top_boss_deaths = top_trash_deaths = None
+        for item in death_breakdown.items():
+            counts = item[1]
+            if top_boss_deaths is None or counts["boss"] > top_boss_deaths[1]["boss"]:
+                top_boss_deaths = item
+            if top_trash_deaths is None or counts["trash"] > top_trash_deaths[1]["trash"]:
+                top_trash_deaths = item
+    top_healthstones = (
+        max(healthstone_uses.items(), key=itemgetter(1))
+        if healthstone_uses
+        else ("—", 0)
+    )
+    top_resurrections = (
+        max(resurrection_casts.items(), key=itemgetter(1))
+        if resurrection_casts
+        else ("—", 0)
+    )
+
+    guild_icons_html = build_guild_icons_html(guild_names, icon_data)
+
+    guild_names_display = format_guild_names(tuple(guild_names))
+
+    # Names appear in several panels; escape each one once. Escaping never
+    # produces upper-case letters, so the lowercased sort key can be taken
+    # from the escaped name instead of escaping a second time.
+    escaped_names = {name: _esc(name) for name, _, _ in rows}
+    sort_names = {name: escaped.lower() for name, escaped in escaped_names.items()}
+
+    def esc_name(name: str) -> str:
+        escaped = escaped_names.get(name)
+        return _esc(name) if escaped is None else escaped
+
+    sunder_html = ""
+    if sunder_data:
+        sorted_sunders = heapq.nlargest(10, sunder_data, key=lambda x: x[1] + x[2])
+        max_total_sunders = (sorted_sunders[0][1] + sorted_sunders[0][2]) if sorted_sunders else 1
+        sunder_parts: list[str] = []
+        for medal, medal_class, (name, trash, boss) in zip(_MEDALS, _MEDAL_CLASSES, sorted_sunders):
+            total = trash + boss
+            bar_width = total * 100 // max_total_sunders if max_total_sunders > 0 else 0
+            sunder_parts.append(_SUNDER_ROW.substitute(
+                medal_class=medal_class,
+                medal=medal,
+                name=esc_name(name),
+                bar_width=bar_width,
+                total=total,
+            ))
+        sunder_rows = "".join(sunder_parts)
+
+        sunder_html = f'''
+        <div class="sunder-race full">
+          <h3>⚔️ Sunder Race <span class="sunder-subtitle">(total sunders)</span></h3>
+          <div class="sunder-list">
+            {sunder_rows}
+          </div>
+        </div>'''
+
+    yield f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=1200">
+  <title>Raid Consume Report</title>
+  <link rel="preconnect" href="https://fonts.googleapis.com">
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+  <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@600;700&family=Fira+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
+  <style>
+{_FULL_REPORT_CSS}  </style>
 </head>
 <body>
   <div class="container">
@@ -1704,12 +2127,12 @@ def generate_full_report_html(
         <div class="title-block">
           <div class="guild-names">{guild_names_display}</div>
           <div class="raid-subtitle">
-            <span class="raid-badge">{escape(raid_name)}</span>
-            <span class="date-text">{escape(date_str)}</span>
+            <span class="raid-badge">{_esc(raid_name)}</span>
+            <span class="date-text">{_esc(date_str)}</span>
           </div>
         </div>
       </div>
-      <div class="server-badge">{escape(server_name)}</div>
+      <div class="server-badge">{_esc(server_name)}</div>
     </div>
 
     <div class="stats-row">
@@ -1736,49 +2159,49 @@ def generate_full_report_html(
           <div class="highlight-card">
             <h3>💰 Big Spender</h3>
             <div class="highlight-value">
-              <span class="name">{escape(top_spender[0])}</span>
+              <span class="name">{esc_name(top_spender[0])}</span>
               <span class="detail"> — {copper_to_gsc_short(top_spender[1])}</span>
             </div>
           </div>
           <div class="highlight-card">
             <h3>💀 Most Deaths</h3>
             <div class="highlight-value">
-              <span class="name">{escape(most_deaths[0])}</span>
-              <span class="detail"> — {most_deaths[2]} death{"s" if most_deaths[2] != 1 else ""}</span>
+              <span class="name">{esc_name(most_deaths[0])}</span>
+              <span class="detail"> — {most_deaths[2]} death{_PLURAL[most_deaths[2] == 1]}</span>
             </div>
           </div>
           <div class="highlight-card">
             <h3>👹 Boss Deaths Leader</h3>
             <div class="highlight-value">
-              <span class="name">{escape(top_boss_deaths[0])}</span>
+              <span class="name">{esc_name(top_boss_deaths[0])}</span>
               <span class="detail"> — {top_boss_deaths[1]["boss"]} deaths</span>
             </div>
           </div>
           <div class="highlight-card">
             <h3>🗑️ Trash Deaths Leader</h3>
             <div class="highlight-value">
-              <span class="name">{escape(top_trash_deaths[0])}</span>
+              <span class="name">{esc_name(top_trash_deaths[0])}</span>
               <span class="detail"> — {top_trash_deaths[1]["trash"]} deaths</span>
             </div>
           </div>
           <div class="highlight-card">
             <h3>🟢 Healthstone King</h3>
             <div class="highlight-value">
-              <span class="name">{escape(top_healthstones[0])}</span>
+              <span class="name">{esc_name(top_healthstones[0])}</span>
               <span class="detail"> — {top_healthstones[1]} used</span>
             </div>
           </div>
           <div class="highlight-card">
             <h3>😇 Resurrection Leader</h3>
             <div class="highlight-value">
-              <span class="name">{escape(top_resurrections[0])}</span>
+              <span class="name">{esc_name(top_resurrections[0])}</span>
               <span class="detail"> — {top_resurrections[1]} casts</span>
             </div>
           </div>
           <div class="highlight-card">
             <h3>🍊 Top Orange Consumer</h3>
             <div class="highlight-value">
-              <span class="name">{escape(top_orange[0])}</span>
+              <span class="name">{esc_name(top_orange[0])}</span>
               <span class="detail"> — {top_orange[1]} used</span>
             </div>
           </div>
@@ -1826,7 +2249,12 @@ def generate_full_report_html(
               </tr>
             </thead>
             <tbody>
-              {table_rows}
+              '''
+    yield from _iter_full_report_rows(
+        rows, sort_names, escaped_names,
+        death_breakdown, healthstone_uses, orange_uses, resurrection_casts,
+    )
+    yield f'''
             </tbody>
           </table>
         </div>
@@ -1835,56 +2263,14 @@ def generate_full_report_html(
 
     <div class="footer">
       <span>Generated by summarize_consumes</span>
-      <span>Prices: {escape(server_name)} AH</span>
+      <span>Prices: {_esc(server_name)} AH</span>
     </div>
   </div>
   <script>
-    (function () {{
-      const table = document.querySelector('.raid-table');
-      if (!table) return;
-      const headers = Array.from(table.querySelectorAll('th.sortable'));
-      const tbody = table.querySelector('tbody');
-
-      const clearSortIndicators = () => {{
-        headers.forEach((header) => {{
-          header.classList.remove('sorted-asc', 'sorted-desc');
-        }});
-      }};
-
-      const sortRows = (columnIndex, type, direction) => {{
-        const rows = Array.from(tbody.querySelectorAll('tr'));
-        const multiplier = direction === 'asc' ? 1 : -1;
-        rows.sort((a, b) => {{
-          const aCell = a.children[columnIndex];
-          const bCell = b.children[columnIndex];
-          const aValue = aCell?.dataset.value ?? aCell?.textContent.trim();
-          const bValue = bCell?.dataset.value ?? bCell?.textContent.trim();
-          if (type === 'number') {{
-            return (Number(aValue) - Number(bValue)) * multiplier;
-          }}
-          return String(aValue).localeCompare(String(bValue)) * multiplier;
-        }});
-        rows.forEach((row) => tbody.appendChild(row));
-      }};
-
-      headers.forEach((header) => {{
-        header.addEventListener('click', () => {{
-          const columnIndex = header.cellIndex;
-          const type = header.dataset.type || 'text';
-          const isDesc = header.classList.contains('sorted-desc');
-          const direction = isDesc ? 'asc' : 'desc';
-          clearSortIndicators();
-          header.classList.add(direction === 'asc' ? 'sorted-asc' : 'sorted-desc');
-          sortRows(columnIndex, type, direction);
-        }});
-      }});
-    }})();
-  </script>
+{_FULL_REPORT_SCRIPT}  </script>
 </body>
 </html>'''
 
-    return html
-
 
 def main():
     parser = argparse.ArgumentParser(
@@ -1916,8 +2302,8 @@ def main():
     
     target_guilds = list(GUILD_CONFIG.keys())
     
-    guild_members: set[str] = set()
-    pets: set[str] = set()
+    guild_members: frozenset[str] = frozenset()
+    pets: frozenset[str] = frozenset()
     raid_name = "Raid"
     raid_date = datetime.now().strftime("%d %b %Y")  # Default fallback
     logger_deaths = 0
@@ -1926,75 +2312,77 @@ def main():
     orange_uses: dict[str, int] = {}
     resurrection_casts: dict[str, int] = {}
     
-    if log_path and log_path.exists():
-        print(f"[INFO] Parsing combat log: {log_path}")
-        guild_members = parse_combat_log_for_guilds(log_path, target_guilds)
-        pets = parse_combat_log_for_pets(log_path)
-        raid_name = detect_raid_from_log(log_path)
-        raid_date = extract_raid_date_from_log(log_path)
-        print(f"[INFO] Found {len(guild_members)} guild members")
-        print(f"[INFO] Found {len(pets)} pet names")
-        print(f"[INFO] Detected raid: {raid_name}")
-        print(f"[INFO] Raid date: {raid_date}")
+    # The CSV and summary are independent of the log, so read them on worker
+    # threads while the log is scanned; the kernel overlaps their readahead.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        csv_future = pool.submit(read_consume_csv, csv_path)
+        sunder_future = None
+        if summary_path and summary_path.exists():
+            sunder_future = pool.submit(parse_sunder_data, summary_path)
         
-        if logger_name:
-            logger_deaths = count_logger_deaths(log_path)
-            print(f"[INFO] Logger '{logger_name}': {logger_deaths} deaths from 'You die.'")
-    
-    sunder_data = []
-    if summary_path and summary_path.exists():
-        print(f"[INFO] Parsing sunder data: {summary_path}")
-        sunder_data = parse_sunder_data(summary_path)
-        print(f"[INFO] Found {len(sunder_data)} sunder entries")
-    
-    rows = []
-    with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.reader(f, delimiter=",")
-        for line in reader:
-            if not line or len(line) < 2:
-                continue
-            name = line[0].strip()
-            copper = safe_int(line[1], 0)
-            deaths = safe_int(line[2], 0) if len(line) > 2 else 0
-            
-            if not name or name in pets:
-                continue
+        if log_path and log_path.exists():
+            print(f"[INFO] Parsing combat log: {log_path}")
+            log_info = parse_combat_log(log_path, target_guilds)
+            guild_members = log_info.guild_members
+            pets = log_info.pets
+            raid_name = log_info.raid_name
+            raid_date = log_info.raid_date
+            print(f"[INFO] Found {len(guild_members)} guild members")
+            print(f"[INFO] Found {len(pets)} pet names")
+            print(f"[INFO] Detected raid: {raid_name}")
+            print(f"[INFO] Raid date: {raid_date}")
             
-            if guild_members and name not in guild_members:
-                continue
-            
-            if logger_name and name == logger_name:
-                deaths += logger_deaths
-            
-            rows.append((name, copper, deaths))
+            if logger_name:
+                logger_deaths = log_info.logger_deaths
+                print(f"[INFO] Logger '{logger_name}': {logger_deaths} deaths from 'You die.'")
+        
+        sunder_data = []
+        if sunder_future is not None:
+            print(f"[INFO] Parsing sunder data: {summary_path}")
+            sunder_data = sunder_future.result()
+            print(f"[INFO] Found {len(sunder_data)} sunder entries")
+        
+        csv_rows = csv_future.result()
+    
+    # Filter in one comprehension against the log's name sets; pets are
+    # dropped and, when the log named guild members, so is everyone else.
+    # With a roster, the allowed names are resolved as one set up front so
+    # each row costs a single membership test.
+    if guild_members:
+        allowed = guild_members - pets - {""}
+        rows = [row for row in csv_rows if row[0] in allowed]
+    else:
+        rows = [row for row in csv_rows if row[0] and row[0] not in pets]
+    if logger_name and logger_deaths:
+        rows = [
+            row if row[0] != logger_name else (row[0], row[1], row[2] + logger_deaths)
+            for row in rows
+        ]
     
     if not rows:
         print("[ERROR] No valid rows!")
         return 1
     
-    rows.sort(key=lambda x: x[1], reverse=True)
+    rows.sort(key=itemgetter(1), reverse=True)
     print(f"[INFO] {len(rows)} players after filtering")
 
     raider_names = {name for name, _, _ in rows}
     if log_path and log_path.exists():
-        death_breakdown = parse_death_breakdown(log_path, raider_names, raid_name, logger_name)
-        healthstone_uses = parse_healthstone_uses(log_path, raider_names, logger_name)
-        orange_uses = parse_orange_uses(log_path, raider_names, logger_name)
-        resurrection_casts = parse_resurrection_casts(log_path, raider_names, logger_name)
+        raider_stats = scan_log(log_path, raider_names, raid_name, logger_name)
+        death_breakdown = raider_stats.death_breakdown
+        healthstone_uses = raider_stats.healthstone_uses
+        orange_uses = raider_stats.orange_uses
+        resurrection_casts = raider_stats.resurrection_casts
         if death_breakdown:
             rows = [
                 (name, copper, death_breakdown.get(name, {"total": deaths})["total"])
                 for name, copper, deaths in rows
             ]
 
-    script_dir = Path(__file__).parent
-    icon_data = {}
-    for guild, config in GUILD_CONFIG.items():
-        icon_path = script_dir / config["icon_path"]
-        if icon_path.exists():
-            icon_data[guild] = load_icon_base64(icon_path)
+    icon_data = load_guild_icons()
+    totals = summarize_rows(rows)
     
-    html = generate_html(
+    write_html(out_html, iter_card_html(
         rows=rows,
         guild_names=target_guilds,
         raid_name=raid_name,
@@ -2002,13 +2390,12 @@ def main():
         icon_data=icon_data,
         date_str=raid_date,
         sunder_data=sunder_data,
-    )
-    
-    out_html.write_text(html, encoding="utf-8")
+        totals=totals,
+    ))
     print(f"[OK] Wrote {out_html}")
 
     if full_report_path:
-        full_html = generate_full_report_html(
+        write_html(full_report_path, iter_full_report_html(
             rows=rows,
             guild_names=target_guilds,
             raid_name=raid_name,
@@ -2020,8 +2407,8 @@ def main():
             healthstone_uses=healthstone_uses,
             orange_uses=orange_uses,
             resurrection_casts=resurrection_casts,
-        )
-        full_report_path.write_text(full_html, encoding="utf-8")
+            totals=totals,
+        ))
         print(f"[OK] Wrote {full_report_path}")
     return 0
 
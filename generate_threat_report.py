@@ -11,6 +11,7 @@ from statistics import mean
 
 LINE_MARKER = "TWT_THREAT"
 PACKET_PREFIX = "TWTv4="
+UNKNOWN_GUID = "UNKNOWN_GUID"
 PART_RE = re.compile(r"_part(\d+)\.txt(?:\.txt)?$", re.IGNORECASE)
 
 TARGET_GUILDS = ["Dark Sun", "Knights Hospitaller"]
@@ -25,6 +26,11 @@ RAID_ZONE_KEYWORDS: list[tuple[str, str]] = [
     ("Zul'Gurub", "zul'gurub"),
 ]
 
+# One alternation over every keyword, so a zone is matched in a single scan;
+# the matched keyword maps back to its raid.
+ZONE_KEYWORD_RAIDS = {keyword: raid_name for raid_name, keyword in RAID_ZONE_KEYWORDS}
+ZONE_KEYWORD_RE = re.compile("|".join(re.escape(keyword) for _, keyword in RAID_ZONE_KEYWORDS))
+
 RAID_BOSSES = {
     "Naxxramas": [
         "Anub'Rekhan", "Grand Widow Faerlina", "Maexxna", "Noth the Plaguebringer",
@@ -65,7 +71,25 @@ HEALING_SPELL_HINTS = {
 }
 
 
-@dataclass
+# Pre-filter for "gains" lines, which only matter for tank-ability auras.
+TANK_ABILITY_SEARCH = re.compile("|".join(re.escape(a) for a in sorted(TANK_ABILITIES))).search
+# Any healing hint as a substring of a cast spell, in one scan.
+HEALING_SPELL_SEARCH = re.compile("|".join(re.escape(h) for h in sorted(HEALING_SPELL_HINTS))).search
+
+# "<caster>['s <spell>] heals ", "<caster> casts <spell>[ on <target>]." and
+# "<caster> gains <aura>." share the caster prefix; the named group that
+# closed each match (lastgroup) tells which one it was.
+ROLE_SIGNAL_RE = re.compile(
+    r"\s(?P<caster>[A-Za-z][A-Za-z'\-]+)"
+    r"(?:(?:'s [^.]+)? (?P<heals>heals) "
+    r"| casts (?P<spell>[^.]+?)(?: on [^.]+)?\."
+    r"| gains (?P<aura>[^.]+)\.)"
+)
+
+
+# Entries and snapshots are created by the ten thousand, so they use slots:
+# no per-instance __dict__, less memory and faster attribute reads.
+@dataclass(slots=True)
 class Entry:
     time: float
     unit: str
@@ -75,7 +99,7 @@ class Entry:
     melee: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Snapshot:
     time: float
     sender: str
@@ -105,9 +129,9 @@ class Fight:
 
 def zone_to_raid(zone_name: str) -> str | None:
     zone = zone_name.strip().lower()
-    for raid_name, keyword in RAID_ZONE_KEYWORDS:
-        if keyword in zone:
-            return raid_name
+    m = ZONE_KEYWORD_RE.search(zone)
+    if m:
+        return ZONE_KEYWORD_RAIDS[m.group(0)]
     if "aq20" in zone:
         return "Ruins of Ahn'Qiraj"
     if "aq40" in zone:
@@ -115,89 +139,133 @@ def zone_to_raid(zone_name: str) -> str | None:
     return None
 
 
-def detect_raid_from_log(log_path: Path) -> str | None:
-    if not log_path.exists():
+def _zone_raid(line: str) -> str | None:
+    if "ZONE_INFO:" not in line:
         return None
-    with log_path.open("r", encoding="utf-8", errors="replace") as handle:
-        for line in handle:
-            if "ZONE_INFO:" not in line:
-                continue
-            parts = line.split("&")
-            if len(parts) < 2:
-                continue
-            raid = zone_to_raid(parts[1])
-            if raid:
-                return raid
-    return None
-
-
-def parse_combat_log_for_guilds(log_path: Path, target_guilds: list[str]) -> set[str]:
-    guild_members = set()
-    if not log_path.exists():
-        return guild_members
-    pattern = re.compile(
-        r"COMBATANT_INFO:.*?&([^&]+)&[A-Z]+&[A-Za-z]+&\d+&[^&]*&(" + "|".join(re.escape(g) for g in target_guilds) + r")&"
-    )
-    with log_path.open("r", encoding="utf-8", errors="replace") as handle:
-        for line in handle:
-            match = pattern.search(line)
-            if match:
-                guild_members.add(match.group(1).strip())
-    return guild_members
+    parts = line.split("&")
+    if len(parts) < 2:
+        return None
+    return zone_to_raid(parts[1])
 
 
-def parse_role_signals(log_path: Path, players: set[str]) -> dict[str, dict[str, int]]:
-    signals = {p: {"heals": 0, "taunts": 0, "tank_abilities": 0} for p in players}
-    if not log_path.exists() or not players:
-        return signals
+def _combatant_guild_member(line: str, guilds: set[str]) -> str | None:
+    # Fields are "...&name&CLASS&Race&sex&...&guild&", so split on "&" and
+    # check them in place instead of running a backtracking regex per line.
+    if "COMBATANT_INFO:" not in line:
+        return None
+    parts = line[line.index("COMBATANT_INFO:"):].split("&", 7)
+    if (
+        len(parts) > 7
+        and parts[6] in guilds
+        and parts[1]
+        and parts[2].isascii() and parts[2].isalpha() and parts[2].isupper()
+        and parts[3].isascii() and parts[3].isalpha()
+        and parts[4].isdecimal()
+    ):
+        return parts[1].strip()
+    return None
 
-    casts_re = re.compile(r"\s([A-Za-z][A-Za-z'\-]+) casts ([^.]+?)(?: on [^.]+)?\.")
-    gains_re = re.compile(r"\s([A-Za-z][A-Za-z'\-]+) gains ([^.]+)\.")
-    heal_re = re.compile(r"\s([A-Za-z][A-Za-z'\-]+)(?:'s [^.]+)? heals ")
 
+def _add_role_signal(line: str, signals: dict[str, dict[str, int]]) -> None:
+    """Count line's heal/taunt/tank signals for their casters."""
+    # Every branch needs its verb as a literal, so lines without one never
+    # reach the regex. "gains" lines are most of the log but only count when
+    # the aura is a tank ability, so those need one of the names as well.
+    if not (" heals " in line or " casts " in line):
+        if " gains " not in line or not TANK_ABILITY_SEARCH(line):
+            return
+    # Like separate heal/cast/gain searches, the first match of each kind on
+    # the line counts, even when one line carries several kinds.
+    seen = set()
+    for m in ROLE_SIGNAL_RE.finditer(line):
+        kind = m.lastgroup
+        if kind in seen:
+            continue
+        seen.add(kind)
+        caster = m.group("caster")
+        sig = signals.get(caster)
+        if sig is None:
+            sig = signals[caster] = {"heals": 0, "taunts": 0, "tank_abilities": 0}
+        if kind == "heals":
+            sig["heals"] += 1
+        elif kind == "spell":
+            spell = m.group("spell").strip()
+            if spell in TAUNT_ABILITIES:
+                sig["taunts"] += 1
+            if spell in TANK_ABILITIES:
+                sig["tank_abilities"] += 1
+            if HEALING_SPELL_SEARCH(spell):
+                sig["heals"] += 1
+        elif m.group("aura").strip() in TANK_ABILITIES:
+            sig["tank_abilities"] += 1
+
+def scan_combat_log(
+    log_path: Path, target_guilds: list[str]
+) -> tuple[str | None, set[str], dict[str, dict[str, int]]]:
+    """
+    Read the combat log once and return (raid, guild members, role signals):
+    the raid of the first ZONE_INFO line naming one, the COMBATANT_INFO names
+    in target_guilds, and each member's heal/taunt/tank-ability counts.
+
+    Guild members are only known once the whole log is read, so role signals
+    are counted for every caster and narrowed to the members at the end.
+    """
+    if not log_path.exists():
+        return None, set(), {}
+    raid_name = None
+    guilds = set(target_guilds)
+    guild_members = set()
+    caster_signals: dict[str, dict[str, int]] = {}
     with log_path.open("r", encoding="utf-8", errors="replace") as handle:
         for line in handle:
-            m = heal_re.search(line)
-            if m:
-                caster = m.group(1)
-                if caster in players:
-                    signals[caster]["heals"] += 1
-
-            m = casts_re.search(line)
-            if m:
-                caster, spell = m.group(1), m.group(2).strip()
-                if caster in players:
-                    if spell in TAUNT_ABILITIES:
-                        signals[caster]["taunts"] += 1
-                    if spell in TANK_ABILITIES:
-                        signals[caster]["tank_abilities"] += 1
-                    if any(h in spell for h in HEALING_SPELL_HINTS):
-                        signals[caster]["heals"] += 1
-
-            m = gains_re.search(line)
-            if m:
-                caster, aura = m.group(1), m.group(2).strip()
-                if caster in players and aura in TANK_ABILITIES:
-                    signals[caster]["tank_abilities"] += 1
-    return signals
-
-
-def parse_entry(raw: str, snap_time: float) -> Entry | None:
-    parts = raw.split(":")
-    if len(parts) != 5:
-        return None
-    unit, tank, threat, pct, melee = parts
-    try:
-        return Entry(
-            time=snap_time,
-            unit=unit.strip(),
-            tank=int(float(tank)),
-            threat=float(threat),
-            percent=float(pct),
-            melee=int(float(melee)),
-        )
-    except ValueError:
-        return None
+            if raid_name is None and "ZONE_INFO:" in line:
+                raid_name = _zone_raid(line)
+            if "COMBATANT_INFO:" in line:
+                member = _combatant_guild_member(line, guilds)
+                if member:
+                    guild_members.add(member)
+            _add_role_signal(line, caster_signals)
+    role_signals = {
+        p: caster_signals.get(p) or {"heals": 0, "taunts": 0, "tank_abilities": 0}
+        for p in guild_members
+    }
+    return raid_name, guild_members, role_signals
+
+
+_ENTRY_FLAGS = {"0": 0, "1": 1}
+
+
+def parse_entries(payload: str, snap_time: float) -> list[Entry]:
+    """
+    Parse a whole "unit:tank:threat:pct:melee;..." payload in one loop.
+
+    Entries without exactly five fields, with a blank unit or with a
+    non-numeric field are skipped.
+    """
+    entries = []
+    append = entries.append
+    flag_get = _ENTRY_FLAGS.get
+    for raw in payload.split(";"):
+        parts = raw.split(":")
+        if len(parts) != 5:
+            continue
+        unit, tank, threat, pct, melee = parts
+        unit = unit.strip()
+        if not unit:
+            continue
+        # The tank/melee flags are almost always a bare "0" or "1"; a table
+        # lookup skips the str -> float -> int round trip for those.
+        tank_flag = flag_get(tank)
+        melee_flag = flag_get(melee)
+        try:
+            if tank_flag is None:
+                tank_flag = int(float(tank))
+            if melee_flag is None:
+                melee_flag = int(float(melee))
+            append(Entry(snap_time, unit, tank_flag, float(threat), float(pct), melee_flag))
+        except ValueError:
+            continue
+    return entries
 
 
 def parse_snapshot(line: str) -> Snapshot | None:
@@ -212,18 +280,13 @@ def parse_snapshot(line: str) -> Snapshot | None:
     packet = cols[5]
     if not packet.startswith(PACKET_PREFIX):
         return None
-    payload = packet[len(PACKET_PREFIX):]
-    entries = []
-    for chunk in payload.split(";"):
-        parsed = parse_entry(chunk.strip(), snap_time)
-        if parsed and parsed.unit:
-            entries.append(parsed)
+    entries = parse_entries(packet[len(PACKET_PREFIX):], snap_time)
     if not entries:
         return None
     return Snapshot(
         time=snap_time,
         sender=sender,
-        target_guid=target_guid or "UNKNOWN_GUID",
+        target_guid=target_guid or UNKNOWN_GUID,
         target_name=target_name or "Unknown Target",
         entries=entries,
     )
@@ -234,26 +297,38 @@ def part_sort_key(path: Path) -> tuple[int, str]:
     return (int(m.group(1)) if m else 0, path.name)
 
 
-def load_snapshots(log_dir: Path) -> list[Snapshot]:
-    files = sorted(log_dir.glob("TWThreatThreatLog*_part*.txt*"), key=part_sort_key)
+def read_part_file(path: Path) -> str:
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+def find_part_files(log_dir: Path) -> list[Path]:
+    return sorted(log_dir.glob("TWThreatThreatLog*_part*.txt*"), key=part_sort_key)
+
+
+def load_snapshots(files: list[Path]) -> list[Snapshot]:
     snapshots: list[Snapshot] = []
+    # Each part file is small, so it is read and decoded in one call rather
+    # than pulled through the line reader.
     for path in files:
-        with path.open("r", encoding="utf-8", errors="replace") as handle:
-            for line in handle:
-                snap = parse_snapshot(line)
-                if snap:
-                    snapshots.append(snap)
+        for line in read_part_file(path).split("\n"):
+            snap = parse_snapshot(line)
+            if snap:
+                snapshots.append(snap)
     snapshots.sort(key=lambda s: s.time)
     return snapshots
 
 
 def split_fights(snapshots: list[Snapshot], gap_seconds: float, min_duration: float, min_snapshots: int) -> list[Fight]:
     fights: list[Fight] = []
-    by_target: dict[tuple[str, str], list[Snapshot]] = defaultdict(list)
+    # A GUID identifies one unit, so it is the grouping key on its own; only
+    # snapshots without a GUID are told apart by target name.
+    by_target: dict[str | tuple[str, str], list[Snapshot]] = defaultdict(list)
     for snap in snapshots:
-        by_target[(snap.target_guid, snap.target_name)].append(snap)
+        guid = snap.target_guid
+        by_target[guid if guid != UNKNOWN_GUID else (guid, snap.target_name)].append(snap)
 
-    for (guid, name), snaps in by_target.items():
+    for snaps in by_target.values():
+        guid, name = snaps[0].target_guid, snaps[0].target_name
         snaps.sort(key=lambda s: s.time)
         current = Fight(target_guid=guid, target_name=name)
         last_time = None
@@ -290,47 +365,55 @@ def filter_to_boss_fights(fights: list[Fight], boss_names: set[str]) -> list[Fig
 
 
 def build_unit_stats(fight: Fight, allowed_players: set[str]) -> dict[str, dict[str, float]]:
-    per_unit: dict[str, dict[str, float]] = {}
+    # Accumulate into flat per-unit lists while walking the entries and only
+    # build the stats dicts once per unit at the end:
+    # [first_time, last_time, first_threat, last_threat, pct_sum, samples, tank_count]
+    # split_fights leaves a fight's snapshots in time order, so a unit's
+    # first entry holds its first time and any later time is a new last time;
+    # only ties at those two times need comparing threat.
+    acc: dict[str, list] = {}
+    acc_get = acc.get
     for snap in fight.snapshots:
         for e in snap.entries:
-            if e.unit not in allowed_players:
+            unit = e.unit
+            if unit not in allowed_players:
                 continue
-            s = per_unit.setdefault(
-                e.unit,
-                {
-                    "first_time": e.time,
-                    "last_time": e.time,
-                    "first_threat": e.threat,
-                    "last_threat": e.threat,
-                    "pct_sum": 0.0,
-                    "pct_n": 0,
-                    "tank_count": 0,
-                    "samples": 0,
-                },
-            )
-            if e.time < s["first_time"]:
-                s["first_time"] = e.time
-                s["first_threat"] = e.threat
-            if e.time > s["last_time"]:
-                s["last_time"] = e.time
-                s["last_threat"] = e.threat
-            if e.time == s["first_time"]:
-                s["first_threat"] = min(s["first_threat"], e.threat)
-            if e.time == s["last_time"]:
-                s["last_threat"] = max(s["last_threat"], e.threat)
-            s["pct_sum"] += e.percent
-            s["pct_n"] += 1
-            s["tank_count"] += int(e.tank == 1)
-            s["samples"] += 1
-
-    for stats in per_unit.values():
-        dt = max(0.0, stats["last_time"] - stats["first_time"])
-        dthreat = max(0.0, stats["last_threat"] - stats["first_threat"])
-        stats["duration"] = dt
-        stats["threat_done"] = dthreat
-        stats["tps"] = dthreat / dt if dt > 0 else 0.0
-        stats["avg_pct"] = stats["pct_sum"] / stats["pct_n"] if stats["pct_n"] else 0.0
-        stats["tank_ratio"] = stats["tank_count"] / stats["samples"] if stats["samples"] else 0.0
+            t = e.time
+            threat = e.threat
+            a = acc_get(unit)
+            if a is None:
+                acc[unit] = [t, t, threat, threat, e.percent, 1, int(e.tank == 1)]
+                continue
+            if t != a[1]:
+                a[1] = t
+                a[3] = threat
+            elif threat > a[3]:
+                a[3] = threat
+            if t == a[0] and threat < a[2]:
+                a[2] = threat
+            a[4] += e.percent
+            a[5] += 1
+            a[6] += e.tank == 1
+
+    per_unit: dict[str, dict[str, float]] = {}
+    for unit, (first_time, last_time, first_threat, last_threat, pct_sum, samples, tank_count) in acc.items():
+        dt = max(0.0, last_time - first_time)
+        dthreat = max(0.0, last_threat - first_threat)
+        per_unit[unit] = {
+            "first_time": first_time,
+            "last_time": last_time,
+            "first_threat": first_threat,
+            "last_threat": last_threat,
+            "pct_sum": pct_sum,
+            "pct_n": samples,
+            "tank_count": tank_count,
+            "samples": samples,
+            "duration": dt,
+            "threat_done": dthreat,
+            "tps": dthreat / dt if dt > 0 else 0.0,
+            "avg_pct": pct_sum / samples,
+            "tank_ratio": tank_count / samples,
+        }
     return per_unit
 
 
@@ -360,6 +443,7 @@ def render_report(
     players: set[str],
     role_signals: dict[str, dict[str, int]],
 ) -> None:
+    players = frozenset(players)
     fight_rows_html = []
     raid_summary = defaultdict(lambda: {"threat": 0.0, "duration": 0.0, "fights": 0, "pct": [], "tank_ratio": []})
 
@@ -470,7 +554,7 @@ def render_report(
         <tbody>{''.join(summary_rows)}</tbody>
       </table>
       <p class='footnote'>Input files: {html.escape(', '.join(source_files))}</p>
-      <p class='footnote'>Fights are grouped by target GUID + target name and split when gaps exceed {gap_seconds:.0f}s. Non-boss targets are removed using raid boss list for {html.escape(raid_name)}.</p>
+      <p class='footnote'>Fights are grouped by target GUID (by target name for targets without a GUID) and split when gaps exceed {gap_seconds:.0f}s. Non-boss targets are removed using raid boss list for {html.escape(raid_name)}.</p>
     </section>
 
     {''.join(fight_rows_html)}
@@ -496,17 +580,17 @@ def main() -> None:
     combat_log = Path(args.combat_log)
     output = Path(args.output)
 
-    snapshots = load_snapshots(log_dir)
+    part_files = find_part_files(log_dir)
+    snapshots = load_snapshots(part_files)
     all_fights = split_fights(snapshots, args.gap, args.min_duration, args.min_snapshots)
 
-    raid_name = args.raid or infer_raid_from_fights(all_fights) or detect_raid_from_log(combat_log) or "Unknown Raid"
+    log_raid, players, role_signals = scan_combat_log(combat_log, TARGET_GUILDS)
+
+    raid_name = args.raid or infer_raid_from_fights(all_fights) or log_raid or "Unknown Raid"
     boss_names = set(RAID_BOSSES.get(raid_name, []))
     fights = filter_to_boss_fights(all_fights, boss_names)
 
-    players = parse_combat_log_for_guilds(combat_log, TARGET_GUILDS)
-    role_signals = parse_role_signals(combat_log, players)
-
-    files = [p.name for p in sorted(log_dir.glob("TWThreatThreatLog*_part*.txt*"), key=part_sort_key)]
+    files = [p.name for p in part_files]
     render_report(fights, output, files, args.gap, raid_name, players, role_signals)
     print(f"Wrote {output} ({len(fights)} boss fights from {len(snapshots)} snapshots; raid={raid_name})")
 
@@ -9,6 +9,11 @@ containing only lines captured while inside that selected raid.
 from __future__ import annotations
 
 import argparse
+import mmap
+import os
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -31,15 +36,20 @@ RAID_ZONE_KEYWORDS: list[tuple[str, str]] = [
     ("Battle for Mount Hyjal", "hyjal summit"),
 ]
 
+# One alternation over every keyword, so a zone is matched in a single scan;
+# the matched keyword maps back to its raid.
+ZONE_KEYWORD_RAIDS = {keyword: raid_name for raid_name, keyword in RAID_ZONE_KEYWORDS}
+ZONE_KEYWORD_RE = re.compile("|".join(re.escape(keyword) for _, keyword in RAID_ZONE_KEYWORDS))
+
 
 def zone_to_raid(zone_name: str) -> str | None:
     zone = zone_name.strip().lower()
     if not zone:
         return None
 
-    for raid_name, keyword in RAID_ZONE_KEYWORDS:
-        if keyword in zone:
-            return raid_name
+    m = ZONE_KEYWORD_RE.search(zone)
+    if m:
+        return ZONE_KEYWORD_RAIDS[m.group(0)]
 
     # Graceful legacy aliases
     if "aq40" in zone:
@@ -65,22 +75,61 @@ def extract_zone_name(line: str) -> str | None:
     return parts[1].strip()
 
 
-def detect_raids(log_path: Path) -> list[str]:
+@contextmanager
+def map_log(log_path: Path):
+    """Yield the log's contents as a read-only mmap.
+
+    Files that can't be mapped (empty files, pipes, some network mounts) are
+    read into memory instead; both support find/rfind and slicing.
+    """
+    with log_path.open("rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield f.read()
+            return
+        with data:
+            yield data
+
+
+def iter_marked_lines(log_path: Path, marker: bytes) -> Iterator[str]:
+    """Yield the decoded lines of log_path that contain marker.
+
+    The file is memory-mapped and searched with find, so the bytes between
+    marker hits are skipped without being copied, split or decoded.
+    """
+    with map_log(log_path) as data:
+        pos = data.find(marker)
+        while pos >= 0:
+            start = data.rfind(b"\n", 0, pos) + 1
+            end = data.find(b"\n", pos)
+            end = len(data) if end < 0 else end + 1
+            yield data[start:end].decode("utf-8", errors="replace")
+            pos = data.find(marker, end)
+
+
+def detect_raids(log_path: Path, first_only: bool = False) -> list[str]:
+    """Return the raids entered in log_path, in order of first appearance.
+
+    Scanning stops once every known raid has been seen, or after the first
+    one when first_only is set.
+    """
     raids: list[str] = []
     seen: set[str] = set()
 
-    with log_path.open("r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            zone = extract_zone_name(line)
-            if zone is None:
-                continue
+    for line in iter_marked_lines(log_path, b"ZONE_INFO:"):
+        zone = extract_zone_name(line)
+        if zone is None:
+            continue
 
-            raid = zone_to_raid(zone)
-            if not raid or raid in seen:
-                continue
+        raid = zone_to_raid(zone)
+        if not raid or raid in seen:
+            continue
 
-            raids.append(raid)
-            seen.add(raid)
+        raids.append(raid)
+        seen.add(raid)
+        if first_only or len(seen) == len(RAID_ZONE_KEYWORDS):
+            break
 
     return raids
 
@@ -112,27 +161,82 @@ def choose_raid_interactive(raids: list[str]) -> str:
         print("[WARN] Invalid selection. Try again.")
 
 
-def filter_log_to_raid(log_path: Path, out_path: Path, selected_raid: str) -> int:
-    lines_out: list[str] = []
-    current_raid: str | None = None
+COPY_CHUNK_SIZE = 1 << 20
 
-    with log_path.open("r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            zone = extract_zone_name(line)
-            if zone is not None:
-                mapped = zone_to_raid(zone)
-                current_raid = mapped
 
-            if current_raid == selected_raid:
-                lines_out.append(line)
+def _copy_lines(data, start: int, end: int, out) -> int:
+    """Write data[start:end] to the text file out, as reading it in text mode would.
 
-    if not lines_out:
-        return 0
+    The range is decoded in line-aligned pieces of about COPY_CHUNK_SIZE, with
+    CRLF/CR line endings turned into newlines first. Returns the number of
+    lines written.
+    """
+    lines = 0
+    text = ""
+    while start < end:
+        stop = min(start + COPY_CHUNK_SIZE, end)
+        if stop < end:
+            cut = data.rfind(b"\n", start, stop)
+            if cut >= 0:
+                stop = cut + 1
+        text = data[start:stop].decode("utf-8", errors="replace")
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        out.write(text)
+        lines += text.count("\n")
+        start = stop
+    if text and not text.endswith("\n"):
+        lines += 1
+    return lines
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text("".join(lines_out), encoding="utf-8")
-    return len(lines_out)
 
+def filter_log_to_raid(log_path: Path, out_path: Path, selected_raid: str) -> int:
+    current_raid: str | None = None
+    kept = 0
+    out = None
+    # Kept lines go to a temporary file next to out_path, which replaces it
+    # only after the whole log has been read. The log may be out_path itself
+    # (filtering in place), and a failure never leaves a half-written output.
+    tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+
+    try:
+        # Only ZONE_INFO lines change the current raid, so the mapped log is
+        # searched for those and everything between two of them is kept or
+        # dropped as one range, streamed to the output without building lines.
+        with map_log(log_path) as data:
+            size = len(data)
+            segment_start = 0
+            pos = data.find(b"ZONE_INFO:")
+            while True:
+                if pos >= 0:
+                    line_start = data.rfind(b"\n", 0, pos) + 1
+                    line_end = data.find(b"\n", pos)
+                    line_end = size if line_end < 0 else line_end + 1
+                    segment_end = line_start
+                else:
+                    segment_end = size
+
+                if current_raid == selected_raid and segment_end > segment_start:
+                    if out is None:
+                        out_path.parent.mkdir(parents=True, exist_ok=True)
+                        out = tmp_path.open("w", encoding="utf-8")
+                    kept += _copy_lines(data, segment_start, segment_end, out)
+
+                if pos < 0:
+                    break
+                zone = extract_zone_name(data[line_start:line_end].decode("utf-8", errors="replace"))
+                if zone is not None:
+                    current_raid = zone_to_raid(zone)
+                segment_start = line_start
+                pos = data.find(b"ZONE_INFO:", line_end)
+
+        if out is not None:
+            out.close()
+            os.replace(tmp_path, out_path)
+    finally:
+        if out is not None:
+            out.close()
+            tmp_path.unlink(missing_ok=True)
+    return kept
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Detect and filter raid segments from WoWCombatLog.txt")
@@ -141,14 +245,22 @@ def main() -> int:
     parser.add_argument("--list", action="store_true", help="List detected raids and exit")
     parser.add_argument("--raid", help="Raid name to filter")
     parser.add_argument("--interactive", action="store_true", help="Prompt interactively when multiple raids exist")
+    parser.add_argument(
+        "--first-raid-only",
+        action="store_true",
+        help="Stop scanning at the first raid zone and use that raid (faster for single-raid logs)",
+    )
     args = parser.parse_args()
+    # Both need every raid in the log, which a scan cut short at the first one can't tell.
+    if args.first_raid_only and (args.list or args.raid):
+        parser.error("--first-raid-only cannot be combined with --list or --raid")
 
     log_path = Path(args.log_path)
     if not log_path.exists():
         print(f"[ERROR] Missing combat log: {log_path}")
         return 1
 
-    raids = detect_raids(log_path)
+    raids = detect_raids(log_path, first_only=args.first_raid_only)
     if not raids:
         print("[ERROR] No raid zones detected in combat log.")
         return 1
@@ -1,86 +1,120 @@
 import csv
 import re
 import sys
-from pathlib import Path
 from html import escape
+from heapq import nlargest
+from itertools import chain, islice
+from operator import itemgetter
+from pathlib import Path
 
 NUM_RE = re.compile(r"-?\d+")
+_num_search = NUM_RE.search
+# A first row whose second column is one of these is a header, e.g.
+# "name,copper,deaths" (none of them contain digits, so they never parse as a number).
+HEADER_COST_COLS = frozenset(("copper", "cost", "total", "total_cost"))
 
 def to_int_any(x) -> int:
     if x is None:
         return 0
-    s = str(x).strip()
+    s = str(x)
+    # Plain digit cells, the usual case, skip the cleanup and the regex.
+    if s.isdecimal():
+        return int(s)
+    s = s.strip()
     if not s:
         return 0
-    m = NUM_RE.search(s.replace(",", ""))
+    m = _num_search(s.replace(",", ""))
     return int(m.group(0)) if m else 0
 
 def copper_to_gsc(copper: int) -> str:
-    g = copper // 10000
-    s = (copper % 10000) // 100
-    c = copper % 100
+    g, rem = divmod(copper, 10000)
+    s, c = divmod(rem, 100)
     return f"{g}g {s:02d}s {c:02d}c"
 
 def make_bar(value: int, max_value: int, width_px: int = 520) -> str:
     if max_value <= 0:
         return ""
-    w = int((value / max_value) * width_px)
+    # Integer math gives the same floor as the float ratio for 0..max_value;
+    # negative (junk) values draw no bar instead of a negative CSS width.
+    w = max(0, value * width_px // max_value)
     return f'<div class="bar" style="width:{w}px"></div>'
 
+DELIMS = (",", ";", "|", "\t")
+
 def sniff_delim(sample: str) -> str:
-    # Try Sniffer first, then fallback heuristic
-    try:
-        d = csv.Sniffer().sniff(sample, delimiters=";,|\t,")
-        return getattr(d, "delimiter", ",")
-    except Exception:
-        return ";" if sample.count(";") > sample.count(",") else ","
+    # Pick the candidate that occurs most often; "," comes first, so it wins ties
+    # (and a sample with none of them).
+    return max(DELIMS, key=sample.count)
+
+def write_html(path: Path, segments) -> None:
+    # Buffered writes of each fragment instead of joining the page first.
+    with path.open("w", encoding="utf-8", buffering=1 << 20) as out:
+        out.writelines(segments)
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: visualize_consumes.py <consumable-totals.csv> <report.html>")
+    args = sys.argv[1:]
+    top = None
+    if "--top" in args:
+        i = args.index("--top")
+        value = args[i + 1] if i + 1 < len(args) else ""
+        if not value.isdecimal() or int(value) < 1:
+            print("[ERROR] --top expects a positive number of rows")
+            return 2
+        top = int(value)
+        del args[i:i + 2]
+
+    if len(args) < 2:
+        print("Usage: visualize_consumes.py <consumable-totals.csv> <report.html> [--top K]")
         return 2
 
-    csv_path = Path(sys.argv[1])
-    out_path = Path(sys.argv[2])
+    csv_path = Path(args[0])
+    out_path = Path(args[1])
 
     if not csv_path.exists():
         print(f"[ERROR] CSV not found: {csv_path}")
         return 1
 
-    raw = csv_path.read_text(encoding="utf-8-sig", errors="replace")
-    sample = "\n".join(raw.splitlines()[:50])
-    delim = sniff_delim(sample)
-
     rows = []
     with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+        # Sniff from the first 50 lines, then rewind and parse the same handle
+        # instead of reading the whole file twice.
+        sample = "".join(islice(f, 50))
+        delim = sniff_delim(sample)
+        f.seek(0)
         reader = csv.reader(f, delimiter=delim)
-        first = True
-        for row in reader:
-            if not row or len(row) < 2:
-                continue
-
-            # Handle optional header row:
-            # If col2 isn't numeric on first row, treat it as headers and skip.
-            if first:
-                first = False
-                if to_int_any(row[1]) == 0 and row[1].strip().lower() in ("copper", "cost", "total", "total_cost"):
-                    continue
-                # Another header pattern: "name,copper,deaths"
-                if row[0].strip().lower() in ("name", "player", "character") and row[1].strip().lower() in ("copper", "cost"):
-                    continue
-
+        data_rows = (row for row in reader if len(row) >= 2)
+
+        # Handle optional header row: check the first row once, up front,
+        # and put it back in front of the rest unless it is a header.
+        first = next(data_rows, None)
+        if first is not None and first[1].strip().lower() not in HEADER_COST_COLS:
+            data_rows = chain((first,), data_rows)
+
+        # Bound to locals once: these run for every cell of the file.
+        to_int = to_int_any
+        append = rows.append
+        for row in data_rows:
+            # Rows without a name are dropped, so skip them before parsing
+            # their numbers.
             name = row[0].strip()
-            copper = to_int_any(row[1])
-            deaths = to_int_any(row[2]) if len(row) > 2 else 0
-
-            if name:
-                rows.append((name, copper, deaths))
+            if not name:
+                continue
+            copper = to_int(row[1])
+            deaths = to_int(row[2]) if len(row) > 2 else 0
+            append((name, copper, deaths))
 
-    rows.sort(key=lambda x: x[1], reverse=True)
+    player_count = len(rows)
     total_copper = sum(r[1] for r in rows)
+    # Totals cover every player; with --top only the K biggest spenders are
+    # rendered, so select them in O(N log K) instead of sorting everything.
+    if top is not None and top < player_count:
+        rows = nlargest(top, rows, key=itemgetter(1))
+    else:
+        rows.sort(key=itemgetter(1), reverse=True)
     max_copper = rows[0][1] if rows else 0
 
-    html = f"""<!doctype html>
+    showing = f'    Showing: <span class="num">top {len(rows)}</span><br/>\n' if top is not None else ""
+    parts = [f"""<!doctype html>
 <html>
 <head>
   <meta charset="utf-8" />
@@ -103,26 +137,26 @@ def main():
   <h1>Consume totals (per player)</h1>
   <div class="meta">
     File: <span class="num">{escape(str(csv_path.name))}</span><br/>
-    Players: <span class="num">{len(rows)}</span><br/>
-    Total cost: <span class="num">{copper_to_gsc(total_copper)}</span>
+    Players: <span class="num">{player_count}</span><br/>
+{showing}    Total cost: <span class="num">{copper_to_gsc(total_copper)}</span>
     <span class="small">({total_copper} copper)</span><br/>
     Delimiter detected: <span class="num">{escape(delim)}</span>
   </div>
-"""
+"""]
 
     if not rows:
-        html += """
+        parts.append("""
   <div class="warn">
     <b>No rows parsed from the CSV.</b><br/>
     Open <code>consumable-totals.csv</code> and confirm it contains rows like <code>Name,1337,2</code>.
   </div>
 </body></html>
-"""
-        out_path.write_text(html, encoding="utf-8")
+""")
+        write_html(out_path, parts)
         print("[WARN] No rows parsed. Report generated with warning box.")
         return 0
 
-    html += """
+    parts.append("""
   <table>
     <thead>
       <tr>
@@ -134,9 +168,10 @@ def main():
       </tr>
     </thead>
     <tbody>
-"""
-    for i, (name, copper, deaths) in enumerate(rows, start=1):
-        html += f"""
+""")
+    # Rows are generated lazily and streamed to the file after the header,
+    # so the whole page is never held in memory as one string.
+    rows_html = (f"""
       <tr>
         <td class="num">{i}</td>
         <td>{escape(name)}</td>
@@ -149,14 +184,14 @@ def main():
           </div>
         </td>
       </tr>
-"""
-    html += """
+""" for i, (name, copper, deaths) in enumerate(rows, start=1))
+    footer = """
     </tbody>
   </table>
 </body>
 </html>
 """
-    out_path.write_text(html, encoding="utf-8")
+    write_html(out_path, chain(parts, rows_html, (footer,)))
     print(f"[OK] Wrote {out_path}")
     return 0
 